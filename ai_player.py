@@ -328,14 +328,6 @@ class PixelPlagiaristAI:
             else:
                 safe_print(f"❌ {self.name}: Failed to leave room - {data.get('message')}")
 
-        @self.sio.on('game_started')
-        def on_game_started(data):
-            """Handle game start."""
-            self.game_phase = "drawing"
-            self.current_prompt = data['prompt']
-            safe_print(f"🎮 {self.name}: Game started! Prompt: '{self.current_prompt}'")
-            self.schedule_action(self.draw_original)
-
         @self.sio.on('phase_changed')
         def on_phase_changed(data):
             """Handle game phase transitions."""
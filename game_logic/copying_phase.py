@@ -43,7 +43,7 @@ class CopyingPhase:
         self.phase_started = True
         
         # Set phase start time for early advance checking
-        self.phase_start_time = time.time()
+        self.phase_start_time = time.monotonic()
 
         # Assign copying tasks - only once per game
         if not self.assignments_made:
@@ -52,9 +52,9 @@ class CopyingPhase:
 
         # Reset copy progress for this copying phase
         for pid in self.game.players:
-            self.game.players[pid]['completed_copies'] = 0
+            self.game.players[pid].completed_copies = 0
         # Clear any previous copied drawings from earlier phases/games
-        self.game.copied_drawings = {}
+        self.game.copied_drawings.clear()
 
         # Send assignments to players and start copying immediately
         self._send_copying_phase(socketio)
@@ -78,7 +78,7 @@ class CopyingPhase:
                   {'num_players': num_players, 'copies_per_player': copies_per_player})
 
         # Clear previous assignments
-        self.game.copy_assignments = {}
+        self.game.copy_assignments.clear()
 
         for p, pid in enumerate(player_ids):
             self.game.copy_assignments[pid] = []
@@ -86,7 +86,7 @@ class CopyingPhase:
                 self.game.copy_assignments[pid].append(player_ids[(p + 1 + i) % num_players])
             
             # Set copies_to_make for each player so we can track progress properly
-            self.game.players[pid]['copies_to_make'] = self.game.copy_assignments[pid].copy()
+            self.game.players[pid].copies_to_make = self.game.copy_assignments[pid].copy()
         
         # Log final assignments
         for player_id in player_ids:
@@ -132,20 +132,20 @@ class CopyingPhase:
             image_path = save_drawing(drawing_data, player_id, self.game.room_id, 'copy', target_id)
 
             self.game.copied_drawings[player_id][target_id] = drawing_data
-            self.game.players[player_id]['completed_copies'] += 1
+            self.game.players[player_id].completed_copies += 1
 
             debug_log("Copied drawing submitted successfully", player_id, self.game.room_id, {
                 'target_id': target_id,
-                'completed_copies': self.game.players[player_id]['completed_copies'],
-                'total_required': len(self.game.players[player_id]['copies_to_make']),
+                'completed_copies': self.game.players[player_id].completed_copies,
+                'total_required': len(self.game.players[player_id].copies_to_make),
                 'image_saved_to': image_path
             })
 
             socketio.emit('copy_submitted', {
                 'player_id': player_id,
                 'target_id': target_id,
-                'completed': self.game.players[player_id]['completed_copies'],
-                'total': len(self.game.players[player_id]['copies_to_make'])
+                'completed': self.game.players[player_id].completed_copies,
+                'total': len(self.game.players[player_id].copies_to_make)
             }, room=self.game.room_id)
             
             # Check if all players have completed copying - advance early if so
@@ -163,8 +163,8 @@ class CopyingPhase:
         # Calculate completion status for each player
         player_completion = {}
         for player_id, player in self.game.players.items():
-            completed = player.get('completed_copies', 0)
-            copies_list = player.get('copies_to_make', [])
+            completed = player.completed_copies
+            copies_list = player.copies_to_make
             # Only count targets that actually have an original drawing available
             valid_targets = [tid for tid in copies_list if tid in self.game.original_drawings]
             required = len(valid_targets)
@@ -183,8 +183,7 @@ class CopyingPhase:
         })
         
         if all_copied:
-            import time
-            current_time = time.time()
+            current_time = time.monotonic()
             if not hasattr(self, 'phase_start_time'):
                 self.phase_start_time = current_time
             
@@ -27,12 +27,12 @@ class DrawingPhase:
 
         # Apply stakes
         for player in self.game.players.values():
-            if player['stake'] == 0:
-                player['stake'] = self.game.prize_per_player
-                player['balance'] -= self.game.prize_per_player
-                debug_log("Applied stake", player['id'], self.game.room_id, {
-                    'stake': player['stake'],
-                    'new_balance': player['balance']
+            if player.stake == 0:
+                player.stake = self.game.prize_per_player
+                player.balance -= self.game.prize_per_player
+                debug_log("Applied stake", player.id, self.game.room_id, {
+                    'stake': player.stake,
+                    'new_balance': player.balance
                 })
 
         # Emit a single phase change event with all prompts for clients to pick their own
@@ -67,7 +67,7 @@ class DrawingPhase:
             return False
 
         # Prevent duplicate submissions
-        if self.game.players[player_id]['has_drawn_original']:
+        if self.game.players[player_id].has_drawn_original:
             debug_log("Drawing submission rejected - already submitted", player_id, self.game.room_id)
             return False
 
@@ -75,7 +75,7 @@ class DrawingPhase:
         image_path = save_drawing(drawing_data, player_id, self.game.room_id, 'original')
 
         self.game.original_drawings[player_id] = drawing_data
-        self.game.players[player_id]['has_drawn_original'] = True
+        self.game.players[player_id].has_drawn_original = True
 
         debug_log("Original drawing submitted successfully", player_id, self.game.room_id, {
             'total_drawings': len(self.game.original_drawings),
@@ -96,9 +96,9 @@ class DrawingPhase:
 
     def check_early_advance(self, socketio):
         """Check if all players have drawn and advance early if possible"""
-        all_drawn = all(player.get('has_drawn_original', False) for player in self.game.players.values())
+        all_drawn = all(player.has_drawn_original for player in self.game.players.values())
         
-        players_status = {pid: player.get('has_drawn_original', False) for pid, player in self.game.players.items()}
+        players_status = {pid: player.has_drawn_original for pid, player in self.game.players.items()}
         debug_log("Checking early advance from drawing phase", None, self.game.room_id, {
             'all_players_drawn': all_drawn,
             'drawings_submitted': len(self.game.original_drawings),
@@ -1,16 +1,73 @@
 # Core game state management for Pixel Plagiarist
+import atexit
 import random
+import re
+import threading
+from dataclasses import asdict
 from datetime import datetime
 from util.config import CONSTANTS, PROMPTS
-from util.logging_utils import debug_log
-from util.db import get_or_create_player, update_player_balance
+from util.logging_utils import DEBUG, debug_log
+from util.db import get_or_create_player, update_player_balances
 
 # Import the modular components
-from .timer import Timer
+from .timer import Timer, TIMER_SERVICE
 from .drawing_phase import DrawingPhase
 from .copying_phase import CopyingPhase
 from .voting_phase import VotingPhase
 from .scoring_engine import ScoringEngine
+from .player_state import PlayerState
+from .room_registry import ensure_default_room
+
+MAX_PLAYERS = CONSTANTS['MAX_PLAYERS']
+MIN_STAKE = CONSTANTS['MIN_STAKE']
+MAX_STAKE = CONSTANTS['MAX_STAKE']
+_USERNAME_RE = re.compile(r'[^\w\s\-]+')  # allow alphanum, underscore, space, dash
+_MAX_USERNAME = 32
+
+
+def sanitize_username(username):
+    """Return a display name as stored for in-game players: disallowed characters removed, length capped."""
+    return _USERNAME_RE.sub('', username.strip())[:_MAX_USERNAME]
+
+# Balances of players who leave mid-game, keyed by username so only the latest value is written
+_pending_balance_writes = {}
+_writes_lock = threading.Lock()
+_BALANCE_FLUSH_DELAY = 0.25  # seconds
+
+
+def queue_balance_write(username, balance):
+    """Queue a player's balance for the next batched database write."""
+    with _writes_lock:
+        schedule_flush = not _pending_balance_writes
+        _pending_balance_writes[username] = balance
+    if schedule_flush:
+        TIMER_SERVICE.schedule(_BALANCE_FLUSH_DELAY, flush_pending_balance_writes)
+
+
+def flush_pending_balance_writes():
+    """Write all queued balances to the database in a single transaction."""
+    global _pending_balance_writes
+    with _writes_lock:
+        if not _pending_balance_writes:
+            return
+        pending, _pending_balance_writes = _pending_balance_writes, {}
+
+    if update_player_balances(list(pending.items())):
+        debug_log("Flushed queued player balances", None, None, {'balances': pending})
+        return
+
+    debug_log("Failed to flush queued player balances", None, None, {'usernames': list(pending)})
+    # Put the rows back for the next flush, keeping any newer balance queued in the meantime
+    with _writes_lock:
+        schedule_flush = not _pending_balance_writes
+        for username, balance in pending.items():
+            _pending_balance_writes.setdefault(username, balance)
+    if schedule_flush:
+        TIMER_SERVICE.schedule(_BALANCE_FLUSH_DELAY, flush_pending_balance_writes)
+
+
+# Balances still waiting for the debounce timer are written before the process exits
+atexit.register(flush_pending_balance_writes)
 
 
 class GameStateGL:
@@ -34,12 +91,14 @@ class GameStateGL:
         """
         self.room_id = room_id
         self.players = {}
+        self._player_count = 0  # Kept in step with self.players by add_player/remove_player
         self.phase = "waiting"  # waiting, drawing, copying, voting, results
         self.prompt = None
         self.player_prompts = {}
         self.prize_per_player = prize_per_player
         self.entry_fee = entry_fee
-        self.max_players = CONSTANTS['MAX_PLAYERS']
+        self._required_balance = prize_per_player + entry_fee  # Minimum balance needed to join
+        self.max_players = MAX_PLAYERS
         self.min_players = 3
 
         # Game state
@@ -47,8 +106,10 @@ class GameStateGL:
         self.copied_drawings = {}
         self.copy_assignments = {}
         self.votes = {}
+        self.total_votes_collected = 0
         self.idx_current_drawing_set = 0
         self.drawing_sets = []
+        self.drawings_by_id = {}  # Drawing data for the current voting sets, served over HTTP
         self.created_at = datetime.now()
         self.percentage_penalties = {}
 
@@ -57,8 +118,11 @@ class GameStateGL:
 
         # Countdown management
         self.countdown_timer = None
-        self.countdown_start_time = None
-        self._stop_countdown = False
+        self.countdown_end_epoch = None
+        self._cancel_countdown = threading.Event()
+
+        # Guards player/phase mutations made from socket handlers and timer callbacks
+        self._lock = threading.RLock()
 
         # Initialize modular components
         self.timer = Timer(self)
@@ -86,69 +150,72 @@ class GameStateGL:
         bool
             True if player was successfully added, False if room is full
         """
-        if not isinstance(username, str):
-            debug_log("Invalid username type", player_id, self.room_id, {'username_type': type(username)})
-            return False
-        
-        username = username.strip()
-        if not username:
-            debug_log("Empty username provided", player_id, self.room_id)
-            return False
+        with self._lock:
+            if not isinstance(username, str):
+                debug_log("Invalid username type", player_id, self.room_id, {'username_type': type(username)})
+                return False
         
-        import re
-        username = re.sub(r'[^\w\s\-]', '', username)  # allow alphanum, underscore, space, dash
-        username = username[:32]  # Limit length
-
-        debug_log("Player attempting to join game", player_id, self.room_id,
-                  {'username': username, 'current_players': len(self.players), 'phase': self.phase})
-
-        # Prevent duplicate additions
-        if player_id in self.players:
-            debug_log("Player already in game, updating username only", player_id, self.room_id,
-                      {'old_username': self.players[player_id]['username'], 'new_username': username})
-            self.players[player_id]['username'] = username
-            return True
-
-        if len(self.players) >= self.max_players:
-            debug_log("Player join rejected - room full", player_id, self.room_id, {'max_players': self.max_players})
-            return False
+            username = sanitize_username(username)
+            if not username:
+                debug_log("Empty username provided", player_id, self.room_id)
+                return False
+
+            # Joins are the hottest path, so skip building log payloads entirely when debug is off
+            if DEBUG:
+                debug_log("Player attempting to join game", player_id, self.room_id,
+                          {'username': username, 'current_players': self._player_count, 'phase': self.phase})
+
+            # Prevent duplicate additions
+            if player_id in self.players:
+                debug_log("Player already in game, updating username only", player_id, self.room_id,
+                          {'old_username': self.players[player_id].username, 'new_username': username})
+                self.players[player_id].username = username
+                return True
+
+            if self._player_count >= self.max_players:
+                debug_log("Player join rejected - room full", player_id, self.room_id,
+                          {'max_players': self.max_players})
+                return False
+
+            # A queued disconnect balance must land before we read this player back from the database
+            with _writes_lock:
+                balance_pending = username in _pending_balance_writes
+            if balance_pending:
+                flush_pending_balance_writes()
 
-        try:
-            # Get or create player from database using username
-            db_player = get_or_create_player(username)
-        except Exception as e:
-            debug_log("Failed to add player to game", player_id, self.room_id,
-                      {'error': str(e), 'username': username})
-            return False
-
-        if db_player['balance'] < self.prize_per_player + self.entry_fee:
-            debug_log("Player balance too low to join game", player_id, self.room_id,
-                      {'balance': db_player['balance'], 'required': self.prize_per_player + self.entry_fee})
-            return False
+            try:
+                # Get or create player from database using username
+                db_player = get_or_create_player(username)
+            except Exception as e:
+                debug_log("Failed to add player to game", player_id, self.room_id,
+                          {'error': str(e), 'username': username})
+                return False
+
+            if db_player['balance'] < self._required_balance:
+                debug_log("Player balance too low to join game", player_id, self.room_id,
+                          {'balance': db_player['balance'], 'required': self._required_balance})
+                return False
+
+            # Store the player's balance before the game starts for tracking
+            self.player_balances_before_game[player_id] = db_player['balance']
+
+            # Create in-memory player state for this game session
+            self.players[player_id] = PlayerState(
+                id=player_id,
+                username=username,
+                balance=db_player['balance']  # Initial balance from database
+            )
+            self._player_count += 1
+
+            if DEBUG:
+                if self._player_count != len(self.players):
+                    debug_log("Player count out of sync after add", player_id, self.room_id,
+                              {'player_count': self._player_count, 'players': len(self.players)})
+                debug_log("Player successfully added to game", player_id, self.room_id,
+                          {'username': username, 'new_player_count': self._player_count,
+                           'balance': db_player['balance']})
 
-        # Store the player's balance before the game starts for tracking
-        self.player_balances_before_game[player_id] = db_player['balance']
-
-        # Create in-memory player state for this game session
-        self.players[player_id] = {
-            'id': player_id,
-            'username': username,
-            'balance': db_player['balance'],  # Initial balance from database
-            'stake': 0,
-            'connected': True,
-            'has_drawn_original': False,
-            'has_copied': False,
-            'copies_to_make': [],
-            'completed_copies': 0,
-            'votes_cast': 0,
-            'has_bet': False
-        }
-
-        debug_log("Player successfully added to game", player_id, self.room_id,
-                  {'username': username, 'new_player_count': len(self.players),
-                   'balance': db_player['balance']})
-
-        return True
+            return True
             
     def remove_player(self, player_id):
         """
@@ -159,167 +226,185 @@ class GameStateGL:
         player_id : str
             Unique identifier of the player to remove
         """
-        debug_log("Player disconnecting from game", player_id, self.room_id,
-                  {'players_before': len(self.players), 'phase': self.phase})
+        with self._lock:
+            if DEBUG:
+                debug_log("Player disconnecting from game", player_id, self.room_id,
+                          {'players_before': self._player_count, 'phase': self.phase})
 
-        if player_id in self.players:
-            username = self.players[player_id]['username']
+            if player_id in self.players:
+                username = self.players[player_id].username
             
-            # If game is in progress, update their balance in the database
-            if self.phase not in ["waiting", "results"]:
-                current_balance = self.players[player_id]['balance']
-                try:
-                    update_player_balance(username, current_balance)
-                    debug_log("Updated player balance on disconnect", player_id, self.room_id,
+                # If game is in progress, queue their balance for the next batched database write
+                if self.phase not in ["waiting", "results"]:
+                    current_balance = self.players[player_id].balance
+                    queue_balance_write(username, current_balance)
+                    debug_log("Queued player balance on disconnect", player_id, self.room_id,
                               {'username': username, 'balance': current_balance})
-                except Exception as e:
-                    debug_log("Failed to update player balance on disconnect", player_id, self.room_id,
-                              {'error': str(e), 'username': username})
-            
-            del self.players[player_id]
-            debug_log("Player removed from game", player_id, self.room_id,
-                      {'username': username, 'players_remaining': len(self.players)})
 
-        # Check if game should end due to insufficient players
-        if len(self.players) < self.min_players and self.phase not in ["waiting", "results"]:
-            debug_log("Ending game early - insufficient players", None, self.room_id,
-                      {'players_remaining': len(self.players), 'min_required': self.min_players,
-                       'removal_source': 'game_state_remove_player'})
-            self.end_game_early()
+                if self.phase == "voting":
+                    self.voting_phase.remove_voter(player_id)
+            
+                del self.players[player_id]
+                self._player_count -= 1
+                if DEBUG:
+                    if self._player_count != len(self.players):
+                        debug_log("Player count out of sync after remove", player_id, self.room_id,
+                                  {'player_count': self._player_count, 'players': len(self.players)})
+                    debug_log("Player removed from game", player_id, self.room_id,
+                              {'username': username, 'players_remaining': self._player_count})
+
+            # Check if game should end due to insufficient players
+            if self._player_count < self.min_players and self.phase not in ["waiting", "results"]:
+                debug_log("Ending game early - insufficient players", None, self.room_id,
+                          {'players_remaining': self._player_count, 'min_required': self.min_players,
+                           'removal_source': 'game_state_remove_player'})
+                self.end_game_early()
 
     def start_game(self, socketio):
         """Start the game with current players."""
-        if len(self.players) < self.min_players:
-            debug_log("Cannot start game - insufficient players", None, self.room_id,
-                      {'current_players': len(self.players), 'min_required': self.min_players})
-            return
-
-        debug_log("Game phase transition", None, self.room_id, {
-            'from_phase': self.phase,
-            'to_phase': 'drawing',
-            'trigger': 'start_game',
-            'player_count': len(self.players)
-        })
-
-        # Store initial balances for all players and deduct fee before game starts
-        for player_id in self.players:
-            self.player_balances_before_game[player_id] = self.players[player_id]['balance']
-            # Deduct the game entry fee from each player's balance
-            self.players[player_id]['balance'] -= self.entry_fee
-            debug_log("Deducted entry fee", player_id, self.room_id,
-                      {'entry_fee': self.entry_fee, 'new_balance': self.players[player_id]['balance']})
-
-        # Ensure joining countdown timer is stopped
-        self.timer.stop_joining_countdown()
+        with self._lock:
+            if self.phase != "waiting":
+                debug_log("Cannot start game - already started", None, self.room_id, {'phase': self.phase})
+                return
+
+            if self._player_count < self.min_players:
+                debug_log("Cannot start game - insufficient players", None, self.room_id,
+                          {'current_players': self._player_count, 'min_required': self.min_players})
+                return
+
+            debug_log("Game phase transition", None, self.room_id, {
+                'from_phase': self.phase,
+                'to_phase': 'drawing',
+                'trigger': 'start_game',
+                'player_count': self._player_count
+            })
+
+            # Snapshot who is in the game once; every per-player step below walks this same view
+            active_players = tuple(self.players.items())
+
+            # Store initial balances for all players and deduct fee before game starts, in one pass
+            entry_fee = self.entry_fee
+            balances_before = self.player_balances_before_game
+            balances_before.clear()
+            for pid, player in active_players:
+                balance = player.balance
+                balances_before[pid] = balance
+                player.balance = balance - entry_fee
+            debug_log("Deducted entry fees", None, self.room_id,
+                      {'entry_fee': entry_fee, 'player_count': len(active_players)})
+
+            # Ensure joining countdown timer is stopped
+            self.timer.stop_joining_countdown()
         
-        # Reset per-game state for a fresh start
-        self.original_drawings = {}
-        self.copied_drawings = {}
-        self.copy_assignments = {}
-        self.votes = {}
-        self.idx_current_drawing_set = 0
-        self.drawing_sets = []
-        self.percentage_penalties = {}
+            # Reset per-game state for a fresh start, reusing the existing containers
+            self.original_drawings.clear()
+            self.copied_drawings.clear()
+            self.copy_assignments.clear()
+            self.votes.clear()
+            self.total_votes_collected = 0
+            self.idx_current_drawing_set = 0
+            self.drawing_sets.clear()
+            self.drawings_by_id.clear()
+            self.percentage_penalties.clear()
         
-        # Reset phase handlers for new game
-        self.copying_phase.reset_for_new_game()
-        self.voting_phase.reset_for_new_game()
-        self.scoring_engine.results_calculated = False
+            # Reset phase handlers for new game
+            self.copying_phase.reset_for_new_game()
+            self.voting_phase.reset_for_new_game()
+            self.scoring_engine.results_calculated = False
         
-        # Update phase to drawing
-        self.phase = "drawing"
+            # Update phase to drawing
+            self.phase = "drawing"
 
-        # Assign different random prompts to each player
-        self.player_prompts = {}
-        available_prompts = PROMPTS.copy()
-        random.shuffle(available_prompts)
+            # Assign different random prompts to each player, reusing prompts only if players outnumber them
+            n_players = len(active_players)
+            if n_players <= len(PROMPTS):
+                chosen_prompts = random.sample(PROMPTS, n_players)
+            else:
+                chosen_prompts = random.sample(PROMPTS, len(PROMPTS)) + random.choices(
+                    PROMPTS, k=n_players - len(PROMPTS))
+            self.player_prompts = {pid: prompt for (pid, _), prompt in zip(active_players, chosen_prompts)}
 
-        for i, player_id in enumerate(self.players.keys()):
-            # Use modulo to cycle through prompts if we have more players than prompts
-            prompt_index = i % len(available_prompts)
-            self.player_prompts[player_id] = available_prompts[prompt_index]
+            debug_log("Game started with individual prompts", None, self.room_id,
+                      {'player_count': self._player_count, 'drawing_timer': self.timer.get_drawing_timer_duration()})
 
-        debug_log("Game started with individual prompts", None, self.room_id,
-                  {'player_count': len(self.players), 'drawing_timer': self.timer.get_drawing_timer_duration()})
+            # Start drawing phase (clients will receive prompts within the phase_changed broadcast)
+            self.drawing_phase.start_phase(socketio)
 
-        # Start drawing phase (clients will receive prompts within the phase_changed broadcast)
-        self.drawing_phase.start_phase(socketio)
-
-        # Create a new default room since this one is now in progress
-        from socket_handlers import check_and_create_default_room
-        check_and_create_default_room(socketio)
+            # Create a new default room since this one is now in progress
+            ensure_default_room(socketio)
 
     def end_game_early(self, socketio=None):
         """End game early due to insufficient players"""
-        # Cancel all active timers to prevent further phase transitions
-        if hasattr(self, 'timer'):
-            self.timer.cancel_phase_timer()
-            self.timer.stop_joining_countdown()
+        with self._lock:
+            # Cancel all active timers to prevent further phase transitions
+            if hasattr(self, 'timer'):
+                self.timer.cancel_phase_timer()
+                self.timer.stop_joining_countdown()
         
-        if len(self.players) < self.min_players:
-            remaining_players = list(self.players.keys())
+            if self._player_count < self.min_players:
+                remaining_players = tuple(self.players.items())
             
-            # Return stakes to all players (but keep entry fee deducted)
-            for player_id in remaining_players:
-                stake = self.players[player_id].get('stake', 0)
-                if stake > 0:
-                    # Return the stake amount to player's balance
-                    self.players[player_id]['balance'] += stake
-                    debug_log("Returned stake for early game end", player_id, self.room_id, {
-                        'stake_returned': stake,
-                        'new_balance': self.players[player_id]['balance']
+                # Return stakes to all players (but keep entry fee deducted)
+                for player_id, player_data in remaining_players:
+                    stake = player_data.stake
+                    if stake > 0:
+                        # Return the stake amount to player's balance
+                        player_data.balance += stake
+                        debug_log("Returned stake for early game end", player_id, self.room_id, {
+                            'stake_returned': stake,
+                            'new_balance': player_data.balance
+                        })
+
+                # Save player balances to database in a single transaction; an early end is
+                # not a completed game, so no game history or stats are recorded
+                flush_pending_balance_writes()
+                try:
+                    if update_player_balances([(p.username, p.balance) for _, p in remaining_players]):
+                        debug_log("Saved player data for early game end", None, self.room_id, {
+                            'balance_changes': {
+                                pid: p.balance - self.player_balances_before_game.get(pid, p.balance)
+                                for pid, p in remaining_players}
+                        })
+                except Exception as e:
+                    debug_log("Failed to save player data on early game end", None, self.room_id, {
+                        'error': str(e)
                     })
 
-            # Save player balances to database
-            try:
-                from util.db import update_player_balance, record_game_completion
-                
-                for player_id, player_data in self.players.items():
-                    username = player_data['username']
-                    balance_before = self.player_balances_before_game.get(player_id, player_data['balance'])
-                    balance_after = player_data['balance']
-                    stake = player_data.get('stake', 0)
-                    
-                    # Update balance in database
-                    update_player_balance(username, balance_after)
-                    
-                    # Record game completion with early end stats
-                    record_game_completion(
-                        username=username,
-                        room_id=self.room_id,
-                        balance_before=balance_before,
-                        balance_after=balance_after,
-                        stake=stake,
-                        points_earned=0,  # No points for early end
-                        originals_drawn=1 if player_id in self.original_drawings else 0,
-                        copies_made=0,  # No copies in early end
-                        votes_cast=0,   # No votes in early end
-                        correct_votes=0
-                    )
-                    
-                    debug_log("Saved player data for early game end", player_id, self.room_id, {
-                        'username': username,
-                        'balance_change': balance_after - balance_before,
-                        'stake_returned': stake
-                    })
-                    
-            except Exception as e:
-                debug_log("Failed to save player data on early game end", None, self.room_id, {
-                    'error': str(e)
-                })
-
-            self.phase = "ended_early"
-            if socketio:
-                socketio.emit('game_ended_early', {
-                    'reason': 'Insufficient players',
-                    'final_balances': {pid: self.players[pid]['balance'] for pid in self.players},
-                    'stakes_returned': True
-                }, room=self.room_id)
+                self.phase = "ended_early"
+                if socketio:
+                    socketio.emit('game_ended_early', {
+                        'reason': 'Insufficient players',
+                        'final_balances': {pid: p.balance for pid, p in remaining_players},
+                        'stakes_returned': True
+                    }, room=self.room_id)
+
+    def set_countdown_cancelled(self, cancelled=True):
+        """Flag the joining countdown as cancelled, or clear the flag when a new countdown starts."""
+        if cancelled:
+            self._cancel_countdown.set()
+        else:
+            self._cancel_countdown.clear()
+
+    def countdown_cancelled(self):
+        """Return True if the joining countdown was cancelled since it last started."""
+        return self._cancel_countdown.is_set()
+
+    def has_username(self, username):
+        """Return True if a player joined the game under this display name, compared after sanitizing."""
+        if not isinstance(username, str):
+            return False
+        username = sanitize_username(username)
+        with self._lock:
+            return any(player.username == username for player in self.players.values())
+
+    def players_payload(self):
+        """Return the players as JSON-serializable dicts for client broadcasts."""
+        return [asdict(player) for player in self.players.values()]
 
     def room_level(self):
-        if self.prize_per_player == CONSTANTS['MIN_STAKE']:
+        if self.prize_per_player == MIN_STAKE:
             return 'Bronze'
-        elif self.prize_per_player == CONSTANTS['MAX_STAKE']:
+        elif self.prize_per_player == MAX_STAKE:
             return 'Gold'
         else:
             print(self.prize_per_player)
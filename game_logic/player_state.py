@@ -0,0 +1,24 @@
+# Per-player session state for Pixel Plagiarist
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class PlayerState:
+    """
+    In-memory state for one player during a game session.
+
+    Uses slots instead of a per-player dict so field access in the phase
+    handlers is a direct attribute load. Serialize with ``dataclasses.asdict``
+    when sending to clients.
+    """
+    id: str
+    username: str
+    balance: int
+    stake: int = 0
+    connected: bool = True
+    has_drawn_original: bool = False
+    has_copied: bool = False
+    copies_to_make: list = field(default_factory=list)
+    completed_copies: int = 0
+    votes_cast: int = 0
+    has_bet: bool = False
@@ -0,0 +1,24 @@
+# Room registry hook for Pixel Plagiarist
+# Lets game logic ask the socket layer for a new default room without importing socket_handlers,
+# which itself imports game_logic.
+
+_default_room_callback = None
+
+
+def register_default_room_callback(callback):
+    """
+    Register the function that makes sure an open default room exists.
+
+    Parameters
+    ----------
+    callback : callable
+        Called with the SocketIO instance whenever a room leaves the waiting phase
+    """
+    global _default_room_callback
+    _default_room_callback = callback
+
+
+def ensure_default_room(socketio):
+    """Ask the registered socket layer to create a default room if one is needed."""
+    if _default_room_callback is not None:
+        _default_room_callback(socketio)
@@ -1,7 +1,38 @@
 # Scoring and token distribution logic for Pixel Plagiarist
-from util.logging_utils import debug_log, save_drawing
+import base64
+import functools
+import io
+import operator
+from collections import Counter, defaultdict
+
+import numpy as np
+from PIL import Image
+
+from util.db import record_player_game_completions, record_drawing_sets_data
+from util.logging_utils import DEBUG, debug_log, save_drawing
 from util.config import CONSTANTS
 
+# Longest base64 payload worth decoding; blank canvases compress to a few KB, so anything larger has strokes
+BLANK_CHECK_MAX_LENGTH = 16384
+
+
+def _encode_blank_canvas(width=400, height=300):
+    """Return the base64 PNG of a plain white canvas matching the client drawing area."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+# Placeholder submitted for players who never sent a copy; encoded once at import
+BLANK_CANVAS_PNG = _encode_blank_canvas()
+# Payloads known to be blank, recognized without decoding
+_KNOWN_BLANK_PNGS = frozenset({BLANK_CANVAS_PNG})
+
+# Fields read from every drawing while scoring a set
+_drawing_fields = operator.itemgetter('id', 'player_id', 'type')
+# Points per vote received: originals earn 100, copies mistaken for the original earn 150
+_POINTS_PER_VOTE = {'original': 100, 'copy': 150}
+
 
 class ScoringEngine:
     """
@@ -21,6 +52,9 @@ class ScoringEngine:
         self.game = game
         self.results_calculated = False  # Prevent duplicate calculations
 
+        # Stable player ordering so per-set scores can be handled as aligned arrays
+        self.player_ids = ()
+
     def calculate_results(self, socketio):
         """
         Calculate scores and distribute tokens for all drawing sets.
@@ -39,10 +73,12 @@ class ScoringEngine:
             debug_log("Results already calculated, skipping duplicate call", None, self.game.room_id)
             return
 
-        debug_log("Calculating game results", None, self.game.room_id, {
-            'total_drawing_sets': len(self.game.drawing_sets),
-            'total_votes_collected': sum(len(votes) for votes in self.game.votes.values())
-        })
+        # Results payloads are built per set and per player, so only construct them when they will be logged
+        if DEBUG:
+            debug_log("Calculating game results", None, self.game.room_id, {
+                'total_drawing_sets': len(self.game.drawing_sets),
+                'total_votes_collected': self.game.total_votes_collected
+            })
 
         self.game.phase = "results"
         self.results_calculated = True  # Mark as calculated
@@ -50,207 +86,210 @@ class ScoringEngine:
         # Calculate scores for each player
         vote_details = []
 
+        self.player_ids = tuple(self.game.players)
+        # Per-player totals across all sets, aligned with player_ids
+        points_total = np.zeros(len(self.player_ids), dtype=np.int64)
+        rewards_total = np.zeros(len(self.player_ids), dtype=np.float64)
+
         # Process each set of drawings
-        for set_index in range(len(self.game.drawing_sets)):
-            vote_details.append(self.calculate_drawing_set_scores(set_index))
-            scores = vote_details[-1]['scores']
-            self.distribute_tokens(set_index, scores)
+        if self.game.players:
+            for set_index in range(len(self.game.drawing_sets)):
+                vote_details.append(self._process_set(set_index, points_total, rewards_total))
+
+        # Credit each player's winnings from every set in a single write-back
+        for i in np.flatnonzero(rewards_total):
+            player = self.game.players.get(self.player_ids[i])
+            if player is not None:
+                player.balance += float(rewards_total[i])
 
         # Log game summary to global log file
         self._log_game_summary()
 
-        # Aggregate total points per player across all sets
-        total_points_by_player = {pid: 0 for pid in self.game.players}
-        for set_result in vote_details:
-            set_scores = set_result.get('scores', {})
-            for pid, pts in set_scores.items():
-                if pid in total_points_by_player:
-                    total_points_by_player[pid] += pts
-        
-        # Compute net tokens gained in this game for each player
-        net_tokens_by_player = {}
+        total_points_by_player = dict(zip(self.player_ids, points_total.tolist()))
+
+        # Collect final balances, names and net tokens gained in one pass over the players
+        final_balances, player_names, net_tokens_by_player = {}, {}, {}
+        balances_before = self.game.player_balances_before_game
         for pid, pdata in self.game.players.items():
-            before = self.game.player_balances_before_game.get(pid, pdata['balance'])
-            after = pdata['balance']
-            net_tokens_by_player[pid] = after - before
+            after = pdata.balance
+            final_balances[pid] = after
+            player_names[pid] = pdata.username
+            net_tokens_by_player[pid] = after - balances_before.get(pid, after)
         
         # Send results
         results = {
-            'final_balances': {pid: self.game.players[pid]['balance'] for pid in self.game.players},
+            'final_balances': final_balances,
             'net_tokens_by_player': net_tokens_by_player,
             'total_points_by_player': total_points_by_player,
             'vote_details': vote_details,  # Detailed scores for each drawing set, need to add code to show in UI
-            'player_names': {pid: self.game.players[pid]['username'] for pid in self.game.players}
+            'player_names': player_names
         }
 
-        debug_log("Game results calculated and sent", None, self.game.room_id, {
-            'final_balances': results['final_balances'],
-        })
+        if DEBUG:
+            debug_log("Game results calculated and sent", None, self.game.room_id, {
+                'final_balances': results['final_balances'],
+            })
 
         socketio.emit('game_results', results, room=self.game.room_id)
 
-    def calculate_drawing_set_scores(self, set_index):
+    def _process_set(self, set_index, points_total, rewards_total):
+        """
+        Score one drawing set and allot its share of the prize pool in a single pass.
+
+        Parameters
+        ----------
+        set_index : int
+            Index of the drawing set in ``self.game.drawing_sets``
+        points_total : numpy.ndarray
+            Running per-player points, aligned with ``self.player_ids``; updated in place
+        rewards_total : numpy.ndarray
+            Running per-player token rewards, aligned with ``self.player_ids``; updated in place
+
+        Returns
+        -------
+        dict
+            Vote details for the set as sent to clients in ``game_results``
+        """
         drawing_set = self.game.drawing_sets[set_index]
         original_id = drawing_set['original_id']
         votes_for_set = self.game.votes.get(set_index, {})
+        players = self.game.players
 
-        vote_counts = {}
-        for drawing in drawing_set['drawings']:
-            vote_counts[drawing['id']] = 0
-
-        # Count votes
+        # Count votes and note correct voters in one pass; drawings outside this set
+        # are ignored when reading the counter
+        original_drawing_id = drawing_set['original_drawing_id']
+        raw_counts = Counter()
+        correct_voters = []
         for voter_id, voted_drawing_id in votes_for_set.items():
-            if voted_drawing_id in vote_counts:
-                vote_counts[voted_drawing_id] += 1
-
-        debug_log("Processing drawing set results", None, self.game.room_id, {
-            'set_index': set_index,
-            'original_player': original_id,
-            'total_votes': len(votes_for_set),
-            'vote_distribution': vote_counts
-        })
+            raw_counts[voted_drawing_id] += 1
+            if voted_drawing_id == original_drawing_id:
+                correct_voters.append(voter_id)
 
         # Award points - only for players still in the game
-        scores = {player_id: 0 for player_id in self.game.players}
-        points_awarded = {}
+        # Scores are keyed in player_ids order so they map straight onto the reward array below
+        player_ids = self.player_ids
+        vote_counts = {}
+        scores = dict.fromkeys(player_ids, 0)
+        points_awarded = defaultdict(int)
         for drawing in drawing_set['drawings']:
-            drawing_id = drawing['id']
-            player_id = drawing['player_id']
-            votes_received = vote_counts[drawing_id]
+            drawing_id, player_id, drawing_type = _drawing_fields(drawing)
+            votes_received = raw_counts[drawing_id]
+            vote_counts[drawing_id] = votes_received
 
             # Skip scoring for players who have left the game
-            if player_id not in self.game.players:
-                debug_log("Skipping scoring for disconnected player", player_id, self.game.room_id, {
-                    'drawing_id': drawing_id,
-                    'votes_received': votes_received
-                })
+            if player_id not in scores:
+                if DEBUG:
+                    debug_log("Skipping scoring for disconnected player", player_id, self.game.room_id, {
+                        'drawing_id': drawing_id,
+                        'votes_received': votes_received
+                    })
                 continue
 
-            if drawing['type'] == 'original':
-                # +100 points per vote for original
-                points = votes_received * 100
-                scores[player_id] += points
-                points_awarded[player_id] = points_awarded.get(player_id, 0) + points
-            else:
-                # +150 points per vote for copy (mistaken as original)
-                points = votes_received * 150
-                scores[player_id] += points
-                points_awarded[player_id] = points_awarded.get(player_id, 0) + points
+            points = votes_received * _POINTS_PER_VOTE[drawing_type]
+            scores[player_id] += points
+            points_awarded[player_id] += points
 
         # Award points to voters who correctly identified original - only for remaining players
-        original_drawing_id = f"original_{original_id}"
-        for voter_id, voted_drawing_id in votes_for_set.items():
-            if voter_id in self.game.players and voted_drawing_id == original_drawing_id:
+        for voter_id in correct_voters:
+            if voter_id in scores:
                 scores[voter_id] += 25
-                points_awarded[voter_id] = points_awarded.get(voter_id, 0) + 25
+                points_awarded[voter_id] += 25
 
-        debug_log("Drawing set scoring complete", None, self.game.room_id, {
-            'set_index': set_index,
-            'points_awarded': points_awarded,
-        })
+        if DEBUG:
+            debug_log("Processed drawing set scores", None, self.game.room_id, {
+                'set_index': set_index,
+                'original_player': original_id,
+                'total_votes': len(votes_for_set),
+                'vote_distribution': vote_counts,
+                'points_awarded': points_awarded,
+            })
 
-        return {
+        set_result = {
             'set_index': set_index,
-            'original_player': self.game.players.get(original_id, {}).get('username', f'Player {original_id}'),
+            'original_player': getattr(players.get(original_id), 'username', f'Player {original_id}'),
             'vote_counts': vote_counts,
             'drawings': drawing_set['drawings'],
             'scores': scores,
         }
 
-    def distribute_tokens(self, set_index, scores):
-        """Distribute token rewards based on scores for a given drawing set."""
-        if not self.game.players:
-            return
-
-        total_score = sum(scores.values())
+        # Distribute this set's prize pool in proportion to points scored
+        scores_arr = np.fromiter(scores.values(), dtype=np.int64, count=len(player_ids))
+        points_total += scores_arr
+        total_score = int(scores_arr.sum())
         if total_score == 0:
-            return
+            return set_result
 
-        # Find all artists in this set
-        drawing_set = self.game.drawing_sets[set_index]
-        artists_in_set = {drawing['player_id'] for drawing in drawing_set['drawings']}
+        # Balances are credited once all sets are processed; see calculate_results
+        rewards = scores_arr * (self.game.prize_per_player / total_score)
+        rewards_total += rewards
 
-        # Calculate minimum stake among artists in this set
-        artists_stakes = {pid: self.game.players[pid]['stake'] for pid in artists_in_set}
-        if not artists_stakes:
-            return
-
-        debug_log("Tokens available for distribution for set", None, self.game.room_id, {
-            'set_index': set_index,
-            'artists_in_set': len(artists_in_set),
-            'prize_per_player': self.game.prize_per_player,
-            'total_score': total_score,
-        })
-
-        # Distribute pool based on point percentages
-        for player_id in self.game.players:
-            score_reward = (scores[player_id] / total_score) * self.game.prize_per_player
-            starting_balance = self.game.players[player_id]['balance']
-            self.game.players[player_id]['balance'] += score_reward
-
-            debug_log("Awarded tokens to player for drawing set", player_id, self.game.room_id, {
+        if DEBUG:
+            debug_log("Awarded tokens for drawing set", None, self.game.room_id, {
                 'set_index': set_index,
-                'points_earned': scores[player_id],
-                'starting_balance': starting_balance,
-                'score_reward': score_reward,
-                'ending_balance': self.game.players[player_id]['balance'],
+                'artists_in_set': len(drawing_set['artists']),
+                'prize_per_player': self.game.prize_per_player,
+                'total_score': total_score,
+                'score_rewards': {player_ids[i]: float(rewards[i]) for i in np.flatnonzero(rewards)},
             })
 
+        return set_result
+
     def _log_game_summary(self):
         """Log game summary to database"""
         # Record game completion in database for each player
         try:
-            from util.db import record_player_game_completion, record_drawing_sets_data
-
+            # Tally copies and votes in one pass over the sets instead of rescanning them per player
+            copies_by_player = Counter(drawing['player_id'] for drawing_set in self.game.drawing_sets
+                                       for drawing in drawing_set['drawings'] if drawing['type'] == 'copy')
+            votes_by_player = Counter()
+            correct_by_player = Counter()
+            for set_index, votes_for_set in self.game.votes.items():
+                original_drawing_id = self.game.drawing_sets[set_index]['original_drawing_id']
+                for voter_id, voted_drawing_id in votes_for_set.items():
+                    votes_by_player[voter_id] += 1
+                    if voted_drawing_id == original_drawing_id:
+                        correct_by_player[voter_id] += 1
+
+            completions = []
             for player_id, player_data in self.game.players.items():
-                balance_before = self.game.player_balances_before_game.get(player_id, player_data['balance'])
-                balance_after = player_data['balance']
-                stake = player_data.get('stake', 0)
+                balance_before = self.game.player_balances_before_game.get(player_id, player_data.balance)
+                balance_after = player_data.balance
+                stake = player_data.stake
 
                 # Calculate statistics for this player
                 originals_drawn = 1 if player_id in self.game.original_drawings else 0
-                copies_made = sum(1 for drawing_set in self.game.drawing_sets
-                                  for drawing in drawing_set['drawings']
-                                  if drawing['type'] == 'copy' and drawing['player_id'] == player_id)
-
-                votes_cast = sum(1 for votes in self.game.votes.values() if player_id in votes)
-
-                # Count correct votes (voted for original drawings)
-                correct_votes = 0
-                for set_index, votes_for_set in self.game.votes.items():
-                    if player_id in votes_for_set:
-                        drawing_set = self.game.drawing_sets[set_index]
-                        voted_drawing_id = votes_for_set[player_id]
-                        original_drawing_id = f"original_{drawing_set['original_id']}"
-                        if voted_drawing_id == original_drawing_id:
-                            correct_votes += 1
+                copies_made = copies_by_player[player_id]
+                votes_cast = votes_by_player[player_id]
+                correct_votes = correct_by_player[player_id]
 
                 # Calculate points earned (simplified - could be more detailed)
                 points_earned = max(0, balance_after - balance_before + stake)  # Net gain plus stake back
 
-                # Record player data
-                record_player_game_completion(
-                    username=player_data['username'],
-                    player_id=player_id,
-                    room_id=self.game.room_id,
-                    balance_before=balance_before,
-                    balance_after=balance_after,
-                    stake=stake,
-                    points_earned=points_earned,
-                    originals_drawn=originals_drawn,
-                    copies_made=copies_made,
-                    votes_cast=votes_cast,
-                    correct_votes=correct_votes
-                )
-
-                debug_log("Recorded game completion for player", player_id, self.game.room_id, {
-                    'balance_change': balance_after - balance_before,
+                completions.append({
+                    'username': player_data.username,
+                    'player_id': player_id,
+                    'balance_before': balance_before,
+                    'balance_after': balance_after,
+                    'stake': stake,
+                    'points_earned': points_earned,
                     'originals_drawn': originals_drawn,
                     'copies_made': copies_made,
                     'votes_cast': votes_cast,
                     'correct_votes': correct_votes
                 })
 
+                if DEBUG:
+                    debug_log("Prepared game completion for player", player_id, self.game.room_id, {
+                        'balance_change': balance_after - balance_before,
+                        'originals_drawn': originals_drawn,
+                        'copies_made': copies_made,
+                        'votes_cast': votes_cast,
+                        'correct_votes': correct_votes
+                    })
+
+            # Record every player's completion in one transaction
+            record_player_game_completions(self.game.room_id, completions)
+
             # Record drawing sets data once outside the player loop
             record_drawing_sets_data(
                 room_id=self.game.room_id,
@@ -260,15 +299,42 @@ class ScoringEngine:
                 player_prompts=self.game.player_prompts
             )
 
-            debug_log("Recorded drawing sets data for game", None, self.game.room_id, {
-                'drawing_sets_count': len(self.game.drawing_sets)
-            })
+            if DEBUG:
+                debug_log("Recorded drawing sets data for game", None, self.game.room_id, {
+                    'drawing_sets_count': len(self.game.drawing_sets)
+                })
 
         except Exception as e:
             debug_log("Failed to record game completion in database", None, self.game.room_id,
                       {'error': str(e)})
 
 
+def _is_blank_pixels(pixels):
+    """Return True if every RGBA pixel is transparent or pure white."""
+    # One little-endian uint32 per pixel: RGB in the low 24 bits, alpha in the high byte
+    words = np.ascontiguousarray(pixels).view('<u4')
+    return bool((((words & 0xFFFFFF) == 0xFFFFFF) | (words < 0x1000000)).all())
+
+
+def _rgba_pixels(img):
+    """Return a read-only RGBA uint8 array for an opened image, converting only when needed."""
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    pixels = np.asarray(img, dtype=np.uint8)
+    pixels.setflags(write=False)
+    return pixels
+
+
+@functools.lru_cache(maxsize=512)
+def _decode_is_blank(encoded_png):
+    """Return (is_blank, (width, height)) for a base64 PNG payload; cached per payload."""
+    img = Image.open(io.BytesIO(base64.b64decode(encoded_png)))
+    if img.mode == 'RGB':
+        # No alpha channel, so blank simply means every channel is 255
+        return bool((np.asarray(img) == 255).all()), img.size
+    return bool(_is_blank_pixels(_rgba_pixels(img))), img.size
+
+
 def is_blank_image(base64_data, player_id=None, room_id=None, drawing_id=None):
     """
     Check if an image is blank (all white/transparent pixels).
@@ -289,10 +355,6 @@ def is_blank_image(base64_data, player_id=None, room_id=None, drawing_id=None):
     bool
         True if image is blank or invalid, False otherwise
     """
-    from PIL import Image
-    import io
-    import base64
-
     try:
         # Ensure base64_data is valid and contains a comma
         if not base64_data or ',' not in base64_data:
@@ -301,23 +363,24 @@ def is_blank_image(base64_data, player_id=None, room_id=None, drawing_id=None):
                 'data_preview': str(base64_data)[:100] if base64_data else 'None'
             })
             return True
-        
-        # Save the problematic image for debugging
-        image_path = 'not_saved'
-        if player_id and room_id:
-            image_path = save_drawing(base64_data, player_id, room_id, 'blank_check', drawing_id)
-            
-        image_data = base64.b64decode(base64_data.split(',')[1])
-        img = Image.open(io.BytesIO(image_data)).convert('RGBA')
-        
+
+        # Payloads this large always contain strokes, so skip decoding them entirely
+        encoded_png = base64_data.split(',', 1)[1]
+        if len(encoded_png) > BLANK_CHECK_MAX_LENGTH:
+            return False
+        if encoded_png in _KNOWN_BLANK_PNGS:
+            return True
+
         # Check if all pixels are white or transparent
-        is_blank = all(pixel[3] == 0 or pixel[:3] == (255, 255, 255) for pixel in img.getdata())
+        is_blank, (width, height) = _decode_is_blank(encoded_png)
         
-        if is_blank and player_id and room_id:
+        if DEBUG and is_blank and player_id and room_id:
+            # Only blank submissions are saved for debugging; drawn ones need no disk write
+            image_path = save_drawing(base64_data, player_id, room_id, 'blank_check', drawing_id)
             debug_log("Image determined to be blank", player_id, room_id, {
                 'drawing_id': drawing_id,
                 'image_saved_to': image_path,
-                'image_size': f"{img.width}x{img.height}"
+                'image_size': f"{width}x{height}"
             })
             
         return is_blank
@@ -1,8 +1,107 @@
 # Timer management for Pixel Plagiarist game phases
+import functools
+import heapq
+import itertools
+import logging
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from util.config import TIMER_CONFIG
-from util.logging_utils import debug_log
+from util.logging_utils import DEBUG, debug_log
+
+
+class TimerHandle:
+    """Cancellable reference to a callback scheduled on the TimerService"""
+
+    __slots__ = ('deadline', 'callback', 'cancelled')
+
+    def __init__(self, deadline, callback):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Mark the callback as cancelled; it is dropped when its deadline comes up"""
+        self.cancelled = True
+
+
+class TimerService:
+    """
+    Process-wide scheduler that fires timer callbacks from a single background thread.
+
+    Deadlines are kept in a heap ordered by monotonic time, so any number of rooms
+    share one sleeping thread instead of parking a thread per countdown or phase.
+    Due callbacks are handed to a small fixed worker pool so a slow phase transition
+    in one room cannot delay timers in the others.
+    """
+
+    def __init__(self, max_workers=8):
+        self._heap = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pp-timer')
+
+    def schedule(self, seconds, callback):
+        """
+        Schedule a callback to run after a delay.
+
+        Parameters
+        ----------
+        seconds : float
+            Delay before the callback fires
+        callback : callable
+            Function to execute when the deadline is reached
+
+        Returns
+        -------
+        TimerHandle
+            Handle whose cancel() prevents the callback from running
+        """
+        handle = TimerHandle(time.monotonic() + seconds, callback)
+        with self._condition:
+            heapq.heappush(self._heap, (handle.deadline, next(self._seq), handle))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pp-timer-service', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return handle
+
+    def _next_due(self):
+        """Block until the earliest live handle is due, then pop and return it"""
+        with self._condition:
+            while True:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                deadline, _, handle = self._heap[0]
+                if handle.cancelled:
+                    heapq.heappop(self._heap)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    heapq.heappop(self._heap)
+                    return handle
+                self._condition.wait(remaining)
+
+    def _run(self):
+        while True:
+            self._pool.submit(self._fire, self._next_due())
+
+    @staticmethod
+    def _fire(handle):
+        # The handle may have been cancelled while waiting for a free worker
+        if handle.cancelled:
+            return
+        try:
+            handle.callback()
+        except Exception:
+            # Logged regardless of debug mode: a failed phase transition would otherwise leave the room stuck
+            logging.getLogger(__name__).exception("Timer callback failed")
+
+
+# Global timer service shared by all game rooms
+TIMER_SERVICE = TimerService()
 
 
 class Timer:
@@ -33,35 +132,40 @@ class Timer:
 
         countdown_duration = TIMER_CONFIG['joining']
         
-        debug_log("Starting joining countdown timer", None, self.game.room_id, {
-            'countdown_seconds': countdown_duration,
-            'player_count': len(self.game.players),
-            'timer_type': 'joining_countdown'
-        })
+        if DEBUG:
+            debug_log("Starting joining countdown timer", None, self.game.room_id, {
+                'countdown_seconds': countdown_duration,
+                'player_count': len(self.game.players),
+                'timer_type': 'joining_countdown'
+            })
         
-        # Set countdown start time for tracking
-        import time
-        self.game.countdown_start_time = time.time()
+        # Wall-clock deadline lets clients and late joiners render the countdown locally
+        end_epoch = time.time() + countdown_duration
+        self.game.countdown_end_epoch = end_epoch
         
-        # Start the countdown using threading.Timer
-        self.countdown_timer = threading.Timer(countdown_duration, lambda: self._countdown_finished(socketio))
-        self.countdown_timer.start()
+        # Schedule the countdown on the shared timer service
+        self.game.set_countdown_cancelled(False)
+        self.countdown_timer = TIMER_SERVICE.schedule(countdown_duration, functools.partial(self._countdown_finished, socketio))
         
         # Emit countdown to all players in room
         socketio.emit('joining_countdown_started', {
-            'seconds': countdown_duration
+            'seconds': countdown_duration,
+            'end_epoch': end_epoch
         }, room=self.game.room_id)
 
     def stop_joining_countdown(self):
         """Stop the joining countdown timer"""
-        debug_log("Stopping joining countdown", None, self.game.room_id, {
-            'timer_was_active': self.countdown_timer is not None
-        })
+        if DEBUG:
+            debug_log("Stopping joining countdown", None, self.game.room_id, {
+                'timer_was_active': self.countdown_timer is not None
+            })
         
+        # A callback already popped by the timer service checks this before starting the game
+        self.game.set_countdown_cancelled()
         if self.countdown_timer:
             self.countdown_timer.cancel()
             self.countdown_timer = None
-        self.game.countdown_start_time = None
+        self.game.countdown_end_epoch = None
 
     def start_phase_timer(self, socketio, seconds, callback):
         """
@@ -76,47 +180,53 @@ class Timer:
         callback : callable
             Function to execute when timer expires
         """
-        debug_log("Starting phase timer", None, self.game.room_id, {
-            'duration_seconds': seconds,
-            'phase': self.game.phase,
-            'timer_type': 'phase_timer'
-        })
+        if DEBUG:
+            debug_log("Starting phase timer", None, self.game.room_id, {
+                'duration_seconds': seconds,
+                'phase': self.game.phase,
+                'timer_type': 'phase_timer'
+            })
         
         if self.phase_timer:
-            debug_log("Cancelling existing phase timer before starting new one", None, self.game.room_id, {
-                'previous_timer_active': True
-            })
+            if DEBUG:
+                debug_log("Cancelling existing phase timer before starting new one", None, self.game.room_id, {
+                    'previous_timer_active': True
+                })
             self.phase_timer.cancel()
         
-        # Use threading.Timer explicitly to avoid class name conflict
-        self.phase_timer = threading.Timer(seconds, callback)
-        self.phase_timer.start()
+        self.phase_timer = TIMER_SERVICE.schedule(seconds, callback)
 
         socketio.emit('phase_timer', {'seconds': seconds}, room=self.game.room_id)
 
     def cancel_phase_timer(self):
         """Cancel the current phase timer with logging"""
         if self.phase_timer:
-            debug_log("Cancelling phase timer", None, self.game.room_id, {
-                'phase': self.game.phase,
-                'timer_was_active': True
-            })
+            if DEBUG:
+                debug_log("Cancelling phase timer", None, self.game.room_id, {
+                    'phase': self.game.phase,
+                    'timer_was_active': True
+                })
             self.phase_timer.cancel()
             self.phase_timer = None
-        else:
+        elif DEBUG:
             debug_log("Attempted to cancel phase timer but no timer active", None, self.game.room_id, {
                 'phase': self.game.phase
             })
 
     def _countdown_finished(self, socketio):
         """Handle countdown completion and start the game"""
-        debug_log("Joining countdown completed - starting game", None, self.game.room_id, {
-            'final_player_count': len(self.game.players)
-        })
+        if self.game.countdown_cancelled():
+            debug_log("Joining countdown was cancelled - not starting game", None, self.game.room_id)
+            return
+
+        if DEBUG:
+            debug_log("Joining countdown completed - starting game", None, self.game.room_id, {
+                'final_player_count': len(self.game.players)
+            })
         
         # Clean up countdown timer
         self.countdown_timer = None
-        self.game.countdown_start_time = None
+        self.game.countdown_end_epoch = None
         
         # Start the game
         self.game.start_game(socketio)
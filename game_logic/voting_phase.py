@@ -1,9 +1,21 @@
 # Voting phase logic for Pixel Plagiarist
 import random
-from PIL import Image
-import io
-import base64
-from util.logging_utils import debug_log
+import time
+from util.logging_utils import DEBUG, debug_log
+from .scoring_engine import BLANK_CANVAS_PNG
+from .timer import TIMER_SERVICE
+
+# Votes arriving within this window are announced to the room in a single votes_cast emit
+VOTE_CAST_BATCH_SECONDS = 0.05
+
+
+# Path prefix of the server.py route that serves voting drawings; the route is registered from this value
+DRAWING_URL_PREFIX = '/drawings'
+
+
+def drawing_url(room_id, drawing_id):
+    """Return the HTTP path that serves a voting drawing's PNG."""
+    return f"{DRAWING_URL_PREFIX}/{room_id}/{drawing_id}"
 
 
 class VotingPhase:
@@ -12,6 +24,9 @@ class VotingPhase:
     vote collection, and phase transitions.
     """
 
+    __slots__ = ('game', 'drawing_sets_created', 'current_set_started', 'set_start_time', 'remaining_voters',
+                 '_pending_vote_notifications', '_vote_notification_timer')
+
     def __init__(self, game):
         """
         Initialize the voting phase handler.
@@ -25,12 +40,21 @@ class VotingPhase:
         self.drawing_sets_created = False  # Prevent duplicate set creation
         self.current_set_started = False  # Prevent duplicate set starts
         self.set_start_time = None  # Track when the current set started
+        self.remaining_voters = 0  # Eligible voters in the current set who have not voted yet
+        self._pending_vote_notifications = []  # Votes not yet announced to the room
+        self._vote_notification_timer = None
 
     def reset_for_new_game(self):
         """Reset flags and timers for a fresh game in this room"""
         self.drawing_sets_created = False
         self.current_set_started = False
         self.set_start_time = None
+        self.remaining_voters = 0
+        with self.game._lock:
+            if self._vote_notification_timer:
+                self._vote_notification_timer.cancel()
+            self._vote_notification_timer = None
+            self._pending_vote_notifications = []
 
     def start_phase(self, socketio):
         """Start the voting phase"""
@@ -63,203 +87,229 @@ class VotingPhase:
 
     def _create_drawing_sets(self):
         """Create drawing sets with originals and copies"""
-        self.game.drawing_sets = []
+        self.game.drawing_sets.clear()
+        self.game.drawings_by_id.clear()
+        copied_drawings = self.game.copied_drawings
+        # Players who didn't submit a copy get the shared blank 400x300 white canvas
+        blank_canvas = f'data:image/png;base64,{BLANK_CANVAS_PNG}'
+
+        # Invert copy assignments once so each original can look up its copiers directly
+        copiers_by_target = {}
+        for player_id, targets in self.game.copy_assignments.items():
+            for target_id in targets:
+                copiers_by_target.setdefault(target_id, []).append(player_id)
 
         for original_player_id in self.game.original_drawings:
+            original_drawing_id = f"original_{original_player_id}"
+
+            # All players who were supposed to copy this original
+            expected_copiers = copiers_by_target.get(original_player_id, ())
+
+            # Build the original plus all copies (both submitted and missing ones) in one list
             drawing_set = {
                 'original_id': original_player_id,
+                'original_drawing_id': original_drawing_id,
+                'prompt': self.game.player_prompts.get(original_player_id, "Unknown prompt"),
                 'drawings': [
                     {
-                        'id': f"original_{original_player_id}",
+                        'id': original_drawing_id,
                         'player_id': original_player_id,
                         'type': 'original',
                         'drawing': self.game.original_drawings[original_player_id]
                     }
-                ]
-            }
-
-            # Find all players who were supposed to copy this original
-            expected_copiers = []
-            for player_id, targets in self.game.copy_assignments.items():
-                if original_player_id in targets:
-                    expected_copiers.append(player_id)
-
-            # Add copies (both submitted and missing ones)
-            copies_found = 0
-            for copier_id in expected_copiers:
-                if (copier_id in self.game.copied_drawings and
-                        original_player_id in self.game.copied_drawings[copier_id]):
-                    # Player submitted a copy
-                    drawing_set['drawings'].append({
-                        'id': f"copy_{copier_id}_{original_player_id}",
-                        'player_id': copier_id,
-                        'type': 'copy',
-                        'target_id': original_player_id,
-                        'drawing': self.game.copied_drawings[copier_id][original_player_id],
-                    })
-                    copies_found += 1
-                else:
-                    # Create a simple 400x300 white canvas as base64 PNG
-                    img = Image.new('RGB', (400, 300), 'white')
-                    buffer = io.BytesIO()
-                    img.save(buffer, format='PNG')
-                    buffer.seek(0)
-                    img_str = base64.b64encode(buffer.getvalue()).decode()
-
-                    # Player didn't submit a copy - add blank canvas
-                    drawing_set['drawings'].append({
+                ] + [
+                    {
                         'id': f"copy_{copier_id}_{original_player_id}",
                         'player_id': copier_id,
                         'type': 'copy',
                         'target_id': original_player_id,
-                        'drawing': f'data:image/png;base64,{img_str}',
-                    })
-                    copies_found += 1
+                        'drawing': copied_drawings.get(copier_id, {}).get(original_player_id, blank_canvas),
+                    }
+                    for copier_id in expected_copiers
+                ]
+            }
+            copies_found = len(expected_copiers)
 
             # Randomize order within set
             random.shuffle(drawing_set['drawings'])
+            # Everyone who drew or copied in this set; reused for voter eligibility and scoring
+            drawing_set['artists'] = frozenset(drawing['player_id'] for drawing in drawing_set['drawings'])
+            # Lookups used by _is_valid_vote on every submitted vote
+            drawing_set['valid_drawing_ids'] = frozenset(drawing['id'] for drawing in drawing_set['drawings'])
+            drawing_set['drawings_by_player'] = {drawing['player_id']: drawing['type']
+                                                 for drawing in drawing_set['drawings']}
+            for drawing in drawing_set['drawings']:
+                self.game.drawings_by_id[drawing['id']] = drawing['drawing']
             self.game.drawing_sets.append(drawing_set)
 
-            debug_log("Created drawing set", None, self.game.room_id, {
-                'original_player': original_player_id,
-                'total_drawings': len(drawing_set['drawings']),
-                'copies_found': copies_found,
-                'expected_copiers': len(expected_copiers)
-            })
+            if DEBUG:
+                debug_log("Created drawing set", None, self.game.room_id, {
+                    'original_player': original_player_id,
+                    'total_drawings': len(drawing_set['drawings']),
+                    'copies_found': copies_found,
+                    'expected_copiers': len(expected_copiers)
+                })
 
     def start_voting_on_set(self, socketio):
         """Start voting on current set using configured timer"""
-        # Prevent duplicate set starts
-        if self.current_set_started:
-            debug_log("Current voting set already started, skipping duplicate call", None, self.game.room_id, {
-                'set_index': self.game.idx_current_drawing_set
+        # Prevent duplicate set starts; the timer thread and a vote handler can both get here,
+        # so the check and the claim happen together under the game lock
+        with self.game._lock:
+            if self.current_set_started:
+                if DEBUG:
+                    debug_log("Current voting set already started, skipping duplicate call", None, self.game.room_id, {
+                        'set_index': self.game.idx_current_drawing_set
+                    })
+                return
+            self.current_set_started = True
+
+        if DEBUG:
+            debug_log("Starting voting on set", None, self.game.room_id, {
+                'set_index': self.game.idx_current_drawing_set,
+                'total_sets': len(self.game.drawing_sets)
             })
-            return
-            
-        debug_log("Starting voting on set", None, self.game.room_id, {
-            'set_index': self.game.idx_current_drawing_set,
-            'total_sets': len(self.game.drawing_sets)
-        })
 
         if self.game.idx_current_drawing_set >= len(self.game.drawing_sets):
             debug_log("All voting sets completed - calculating results", None, self.game.room_id)
             self.game.scoring_engine.calculate_results(socketio)
             return
 
-        self.current_set_started = True
         # Reset the timer for this new voting set
-        import time
-        self.set_start_time = time.time()
+        self.set_start_time = time.monotonic()
         
         current_set = self.game.drawing_sets[self.game.idx_current_drawing_set]
-        original_player_id = current_set['original_id']
-        original_prompt = self.game.player_prompts.get(original_player_id, "Unknown prompt")
+        original_prompt = current_set['prompt']
 
-        # Prepare shuffled drawings for all players
-        shuffled_drawings = current_set['drawings'].copy()
-        random.shuffle(shuffled_drawings)
+        # _create_drawing_sets already shuffled the set, so its order is sent to all players as-is.
+        # Images are fetched over HTTP, so each emit carries a URL instead of the base64 PNG.
+        shuffled_drawings = [dict(drawing, drawing=drawing_url(self.game.room_id, drawing['id']))
+                             for drawing in current_set['drawings']]
 
+        voting_timer = self.game.timer.get_voting_timer_duration()
         eligible_voters = self.get_eligible_voters_for_set(current_set)
+        excluded_players = [pid for pid in self.game.players if pid in current_set['artists']]
+        self.remaining_voters = len(eligible_voters)
+
+        if DEBUG:
+            debug_log("Voting eligibility determined", None, self.game.room_id, {
+                'eligible_voters': len(eligible_voters),
+                'excluded_players': len(excluded_players),
+                'drawings_in_set': len(current_set['drawings']),
+                'original_prompt': original_prompt
+            })
 
-        debug_log("Voting eligibility determined", None, self.game.room_id, {
-            'eligible_voters': len(eligible_voters),
-            'drawings_in_set': len(current_set['drawings']),
-            'original_prompt': original_prompt
-        })
-
-        # Send voting data to eligible players
-        for player_id in self.game.players:
-            if player_id in eligible_voters:
-                # Randomize order for each player to prevent collusion
-                debug_log("Sending voting round to eligible player", player_id, self.game.room_id, {
-                    'set_index': self.game.idx_current_drawing_set,
-                    'drawings_count': len(shuffled_drawings)
-                })
+        voting_payload = {
+            'set_index': self.game.idx_current_drawing_set,
+            'total_sets': len(self.game.drawing_sets),
+            'drawings': shuffled_drawings,
+            'prompt': original_prompt,  # Add the original prompt
+            'timer': voting_timer
+        }
 
-                socketio.emit('voting_round', {
-                    'set_index': self.game.idx_current_drawing_set,
-                    'total_sets': len(self.game.drawing_sets),
-                    'drawings': shuffled_drawings,
-                    'prompt': original_prompt,  # Add the original prompt
-                    'timer': self.game.timer.get_voting_timer_duration()
-                }, to=player_id)
-            else:
-                debug_log("Player excluded from voting round", player_id, self.game.room_id, {
-                    'set_index': self.game.idx_current_drawing_set,
-                    'reason': 'drew_or_copied_in_set'
-                })
+        # One emit per audience: the packet is encoded once and delivered to every listed sid.
+        # An empty recipient list would broadcast to everyone, so each emit is guarded.
+        if eligible_voters:
+            socketio.emit('voting_round', voting_payload, to=eligible_voters)
 
-                # Add voting drawings and prompt data to the excluded player event
-                socketio.emit('voting_round_excluded', {
-                    'set_index': self.game.idx_current_drawing_set,
-                    'total_sets': len(self.game.drawing_sets),
-                    'reason': 'You drew or copied in this set',
-                    'drawings': shuffled_drawings,  # Add drawings for observation
-                    'prompt': original_prompt,  # Add the original prompt
-                    'timer': self.game.timer.get_voting_timer_duration()
-                }, to=player_id)
+        if excluded_players:
+            # Excluded players get the same drawings and prompt for observation
+            socketio.emit('voting_round_excluded', {**voting_payload, 'reason': 'You drew or copied in this set'},
+                          to=excluded_players)
 
         self.game.timer.start_phase_timer(
             socketio,
-            self.game.timer.get_voting_timer_duration(),
+            voting_timer,
             lambda: self.next_voting_set(socketio)
         )
 
     def get_eligible_voters_for_set(self, drawing_set):
-        # Determine who can vote on this set
-        excluded_players = set()
-        for drawing in drawing_set['drawings']:
-            excluded_players.add(drawing['player_id'])
-
+        # Players who drew or copied in this set cannot vote on it
+        excluded_players = drawing_set['artists']
         return [pid for pid in self.game.players if pid not in excluded_players]
 
     def submit_vote(self, player_id, drawing_id, socketio, check_early_advance=True):
         """Record a player's vote for which drawing they think is original."""
-        debug_log("Player submitting vote", player_id, self.game.room_id, {
-            'drawing_id': drawing_id,
-            'set_index': self.game.idx_current_drawing_set,
-            'phase': self.game.phase
-        })
-
-        # Comprehensive vote validation with detailed logging
-        validation_result = self._validate_vote(player_id, drawing_id)
-        if not validation_result['valid']:
-            debug_log("Vote submission rejected", player_id, self.game.room_id, {
+        if DEBUG:
+            debug_log("Player submitting vote", player_id, self.game.room_id, {
                 'drawing_id': drawing_id,
                 'set_index': self.game.idx_current_drawing_set,
-                'rejection_reason': validation_result['reason'],
-                'validation_details': validation_result['details']
+                'phase': self.game.phase
             })
-            return False
-
-        set_index = self.game.idx_current_drawing_set
-
-        if set_index not in self.game.votes:
-            self.game.votes[set_index] = {}
 
-        self.game.votes[set_index][player_id] = drawing_id
-        self.game.players[player_id]['votes_cast'] += 1
+        # Check and record in one step so concurrent submissions cannot both pass validation
+        with self.game._lock:
+            set_index = self.game.idx_current_drawing_set
+            # Cheap boolean check first; the detailed diagnosis is only built for logging a rejection
+            is_valid = self._is_valid_vote(player_id, drawing_id, set_index)
+            if is_valid:
+                if set_index not in self.game.votes:
+                    self.game.votes[set_index] = {}
+
+                self.game.votes[set_index][player_id] = drawing_id
+                self.game.total_votes_collected += 1
+                # _is_valid_vote rejects revotes, so every recorded vote is a new voter
+                self.remaining_voters -= 1
+                self.game.players[player_id].votes_cast += 1
+
+        if not is_valid:
+            if DEBUG:
+                validation_result = self._validate_vote(player_id, drawing_id)
+                debug_log("Vote submission rejected", player_id, self.game.room_id, {
+                    'drawing_id': drawing_id,
+                    'set_index': set_index,
+                    'rejection_reason': validation_result['reason'],
+                    'validation_details': validation_result['details']
+                })
+            return False
 
-        debug_log("Vote recorded successfully", player_id, self.game.room_id, {
-            'drawing_id': drawing_id,
-            'set_index': set_index,
-            'total_votes_cast': self.game.players[player_id]['votes_cast'],
-            'votes_in_set': len(self.game.votes[set_index])
-        })
+        if DEBUG:
+            debug_log("Vote recorded successfully", player_id, self.game.room_id, {
+                'drawing_id': drawing_id,
+                'set_index': set_index,
+                'total_votes_cast': self.game.players[player_id].votes_cast,
+                'votes_in_set': len(self.game.votes[set_index])
+            })
 
-        socketio.emit('vote_cast', {
-            'player_id': player_id,
-            'set_index': set_index
-        }, room=self.game.room_id)
+        self._queue_vote_notification(player_id, set_index, socketio)
 
         # Check if all eligible voters have voted - advance early if so
         if check_early_advance:
-            self.check_early_advance(socketio)
+            self.check_early_advance(socketio, set_index)
         return True
 
+    def _queue_vote_notification(self, player_id, set_index, socketio):
+        """Queue a vote notice; the first vote in a window schedules the batched emit"""
+        with self.game._lock:
+            self._pending_vote_notifications.append({'player_id': player_id, 'set_index': set_index})
+            if self._vote_notification_timer is None:
+                self._vote_notification_timer = TIMER_SERVICE.schedule(
+                    VOTE_CAST_BATCH_SECONDS, lambda: self._flush_vote_notifications(socketio))
+
+    def _flush_vote_notifications(self, socketio):
+        """Announce every vote queued since the last flush in one room broadcast"""
+        with self.game._lock:
+            pending = self._pending_vote_notifications
+            self._pending_vote_notifications = []
+            self._vote_notification_timer = None
+        if pending:
+            socketio.emit('votes_cast', {'votes': pending}, room=self.game.room_id)
+
+    def _is_valid_vote(self, player_id, drawing_id, set_index):
+        """Return whether a vote on the given set may be recorded, using the set's precomputed lookups"""
+        if (self.game.phase != "voting" or player_id not in self.game.players
+                or set_index >= len(self.game.drawing_sets)):
+            return False
+        current_set = self.game.drawing_sets[set_index]
+        return (player_id not in current_set['artists']
+                and drawing_id in current_set['valid_drawing_ids']
+                and player_id not in self.game.votes.get(set_index, ()))
+
     def _validate_vote(self, player_id, drawing_id):
         """
         Comprehensive vote validation with detailed logging.
+
+        Applies the same rules as _is_valid_vote but explains the outcome;
+        submit_vote only calls it to log why a vote was rejected.
         
         Returns
         -------
@@ -296,24 +346,18 @@ class VotingPhase:
         current_set = self.game.drawing_sets[self.game.idx_current_drawing_set]
         
         # Check if player is eligible to vote (didn't draw or copy in this set)
-        eligible_voters = self.get_eligible_voters_for_set(current_set)
-        if player_id not in eligible_voters:
+        if player_id in current_set['artists']:
             # Find out why they're not eligible
-            exclusion_reason = []
-            for drawing in current_set['drawings']:
-                if drawing['player_id'] == player_id:
-                    if drawing['type'] == 'original':
-                        exclusion_reason.append('drew_original')
-                    elif drawing['type'] == 'copy':
-                        exclusion_reason.append('made_copy')
-            
+            drawing_type = current_set['drawings_by_player'].get(player_id)
+            exclusion_reason = ['drew_original' if drawing_type == 'original' else 'made_copy']
+
             return {
                 'valid': False,
                 'reason': 'player_not_eligible',
                 'details': {
                     'set_index': self.game.idx_current_drawing_set,
                     'exclusion_reasons': exclusion_reason,
-                    'eligible_voters': len(eligible_voters)
+                    'eligible_voters': len(self.game.players.keys() - current_set['artists'])
                 }
             }
 
@@ -330,14 +374,13 @@ class VotingPhase:
             }
 
         # Check if drawing_id exists in current set
-        valid_drawing_ids = [drawing['id'] for drawing in current_set['drawings']]
-        if drawing_id not in valid_drawing_ids:
+        if drawing_id not in current_set['valid_drawing_ids']:
             return {
                 'valid': False,
                 'reason': 'invalid_drawing_id',
                 'details': {
                     'submitted_drawing_id': drawing_id,
-                    'valid_drawing_ids': valid_drawing_ids,
+                    'valid_drawing_ids': sorted(current_set['valid_drawing_ids']),
                     'set_index': set_index
                 }
             }
@@ -348,45 +391,64 @@ class VotingPhase:
             'reason': None,
             'details': {
                 'set_index': set_index,
-                'eligible_voters_count': len(eligible_voters),
+                'eligible_voters_count': len(self.game.players.keys() - current_set['artists']),
                 'drawings_in_set': len(current_set['drawings'])
             }
         }
 
     def next_voting_set(self, socketio):
         """Move to next voting set"""
-        debug_log("Moving to next voting set", None, self.game.room_id, {
-            'completed_set': self.game.idx_current_drawing_set,
-            'votes_received': len(self.game.votes.get(self.game.idx_current_drawing_set, {}))
-        })
+        if DEBUG:
+            debug_log("Moving to next voting set", None, self.game.room_id, {
+                'completed_set': self.game.idx_current_drawing_set,
+                'votes_received': len(self.game.votes.get(self.game.idx_current_drawing_set, {}))
+            })
 
-        self.current_set_started = False  # Reset for next set
-        self.game.idx_current_drawing_set += 1
+        with self.game._lock:
+            self.current_set_started = False  # Reset for next set
+            self.remaining_voters = 0
+            self.game.idx_current_drawing_set += 1
         self.start_voting_on_set(socketio)
 
-    def check_early_advance(self, socketio):
-        """Check if all eligible voters have voted and advance early if possible"""
-        n = len(self.game.drawing_sets)
-        current_set = (self.game.drawing_sets[self.game.idx_current_drawing_set]
-                       if self.game.idx_current_drawing_set < n else None)
-        if current_set:
-            # Find eligible voters (those who didn't draw or copy in this set)
-            eligible_voters = self.get_eligible_voters_for_set(current_set)
-            set_votes = self.game.votes.get(self.game.idx_current_drawing_set, {})
-
-            # Check if all eligible voters have voted
-            all_voted = all(voter_id in set_votes for voter_id in eligible_voters)
-            
-            # Advance immediately if all eligible voters have voted, or if there are no eligible voters
-            if all_voted or len(eligible_voters) == 0:
-                debug_log(
-                    "All eligible players have voted - advancing to next voting set early", None, self.game.room_id)
-                # Cancel current timer
-                self.game.timer.cancel_phase_timer()
-                socketio.emit('early_phase_advance', {
-                    'next_phase': 'next_voting_set' if self.game.idx_current_drawing_set + 1 < n else 'results',
-                    'reason': 'All eligible players have voted' if len(eligible_voters) > 0 else 'No eligible voters in this set'
-                }, room=self.game.room_id)
-                self.next_voting_set(socketio)
-                return True
-        return False
+    def remove_voter(self, player_id):
+        """Stop waiting on a player who left before voting on the current set"""
+        set_index = self.game.idx_current_drawing_set
+        if not self.current_set_started or set_index >= len(self.game.drawing_sets):
+            return
+        if (player_id not in self.game.drawing_sets[set_index]['artists']
+                and player_id not in self.game.votes.get(set_index, {})):
+            self.remaining_voters -= 1
+
+    def check_early_advance(self, socketio, set_index=None):
+        """
+        Check if all eligible voters have voted and advance early if possible.
+
+        set_index is the set a vote was just recorded on; if another thread has
+        already moved past it, that set's completion must not advance the new one.
+        """
+        with self.game._lock:
+            if set_index is None:
+                set_index = self.game.idx_current_drawing_set
+            if set_index != self.game.idx_current_drawing_set or set_index >= len(self.game.drawing_sets):
+                return False
+            # Advance immediately once every eligible voter has voted
+            if self.remaining_voters > 0:
+                return False
+            debug_log(
+                "All eligible players have voted - advancing to next voting set early", None, self.game.room_id)
+            # Cancel current timer
+            self.game.timer.cancel_phase_timer()
+            # Run the transition on the timer service's workers so the vote handler returns right away
+            TIMER_SERVICE.schedule(0, lambda: self._advance_early(socketio, set_index))
+            return True
+
+    def _advance_early(self, socketio, set_index):
+        """Move past a fully voted set unless something else already advanced it"""
+        with self.game._lock:
+            if self.game.phase != "voting" or self.game.idx_current_drawing_set != set_index:
+                return
+            socketio.emit('early_phase_advance', {
+                'next_phase': 'next_voting_set' if set_index + 1 < len(self.game.drawing_sets) else 'results',
+                'reason': 'All eligible players have voted'
+            }, room=self.game.room_id)
+            self.next_voting_set(socketio)
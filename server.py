@@ -17,23 +17,73 @@ Set DEBUG_MODE=true as an environment variable to enable detailed logging:
 - Tracks game state changes and phase transitions
 - Records player actions with timestamps and context
 - Use 'heroku config:set DEBUG_MODE=true' for Heroku deployments
+
+Async Mode
+----------
+Set ASYNC_MODE=eventlet to serve Socket.IO on eventlet green threads instead of the
+default OS threads, which lets one dyno hold far more concurrent websockets:
+- The standard library is monkey-patched before any other import
+- Timers, locks and the timer worker pool then run as green threads
+- Use 'heroku config:set ASYNC_MODE=eventlet' for Heroku deployments
 """
 
 import os
+
+# Green-thread servers must patch the standard library before anything else imports it
+ASYNC_MODE = os.environ.get('ASYNC_MODE', 'threading').lower()
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+import glob
 import json
-from flask import Flask, render_template, session, redirect, url_for, request
+import base64
+import binascii
+from functools import lru_cache
+from urllib.parse import quote_plus
+from flask import Flask, Response, render_template, session, redirect, url_for, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO
 from authlib.integrations.flask_client import OAuth
+from authlib.integrations.requests_client import OAuth2Session
+from requests.adapters import HTTPAdapter
+from werkzeug.exceptions import NotFound
 
 # Import our modular components
+from util import fast_json
 from util.config import CONSTANTS
 from util.logging_utils import setup_logging
-from util.db import initialize_database, get_leaderboard
+from util.db import initialize_database, get_leaderboard, get_player_stats, update_player_balance
 from socket_handlers import setup_socket_handlers
 from socket_handlers.game_state import GAME_STATE_SH
+from game_logic.voting_phase import DRAWING_URL_PREFIX
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes responses through util.fast_json, like the Socket.IO packets.
+
+    sort_keys and Flask's default encoder (including HTTP-date datetimes) are honoured
+    under orjson. orjson cannot escape non-ASCII text, so ensure_ascii is off here
+    and responses are UTF-8 whichever encoder runs.
+    """
+
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs):
+        # Flask's default encoder handles datetimes and any types orjson hands back
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return fast_json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return fast_json.loads(s, **kwargs)
+
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'pixel_plagiarist_secret_key')
 
 
@@ -41,16 +91,15 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'pixel_plagiarist_secret
 def load_oauth_config():
     """Load OAuth configuration from client secret JSON file"""
     try:
-        # Find the client secret JSON file
-        util_dir = os.path.join(os.path.dirname(__file__), 'util')
-        json_files = [f for f in os.listdir(util_dir) if f.startswith('client_secret_') and f.endswith('.json')]
-
-        if not json_files:
-            print("No client secret JSON file found. OAuth will be disabled.")
-            return None, None
-
-        json_file = json_files[0]  # Use the first one found
-        json_path = os.path.join(util_dir, json_file)
+        # An explicit path skips searching util/ for the downloaded client secret file
+        json_path = os.environ.get('OAUTH_CLIENT_SECRET_PATH')
+        if not json_path:
+            json_paths = glob.glob(os.path.join(os.path.dirname(__file__), 'util', 'client_secret_*.json'))
+            if not json_paths:
+                print("No client secret JSON file found. OAuth will be disabled.")
+                return None, None
+            json_path = json_paths[0]  # Use the first one found
+        json_file = os.path.basename(json_path)
 
         with open(json_path, 'r') as f:
             config = json.load(f)
@@ -74,6 +123,23 @@ def load_oauth_config():
         return None, None
 
 
+# authlib opens a fresh session for every OAuth call; sharing one adapter keeps TLS connections to Google alive
+_OAUTH_HTTP_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=50)
+
+
+class PooledOAuth2Session(OAuth2Session):
+    """OAuth2Session that sends its HTTPS requests through the shared keep-alive adapter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mount('https://', _OAUTH_HTTP_ADAPTER)
+
+    def close(self):
+        # authlib closes each session after one call; the shared pool must outlive it
+        self.adapters.pop('https://', None)
+        super().close()
+
+
 # Load OAuth credentials
 GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET = load_oauth_config()
 
@@ -92,11 +158,13 @@ if GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET:
             name='google',
             client_id=GOOGLE_CLIENT_ID,
             client_secret=GOOGLE_CLIENT_SECRET,
-            server_metadata_url='https://accounts.google.com/.well-known/openid_configuration',
+            # Discovery document and JWKS are fetched once and kept on the client by authlib
+            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
             client_kwargs={
                 'scope': 'openid email profile'
             }
         )
+        google.client_cls = PooledOAuth2Session
         oauth_enabled = True
         print("Google OAuth initialized successfully")
     except Exception as e:
@@ -106,7 +174,7 @@ else:
     print("OAuth credentials not found. Using username-only authentication.")
 
 # Initialize Socket.IO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, json=fast_json)
 
 # Set up logging
 logger = setup_logging(file_root='server')
@@ -114,14 +182,19 @@ logger = setup_logging(file_root='server')
 # Set up Socket.IO event handlers
 setup_socket_handlers(socketio)
 
-# Initialize database on startup
-try:
-    initialize_database()
-    print("Database initialized successfully")
-except Exception as e:
-    print(f"Failed to initialize database: {e}")
-    # Continue running but log the error
-    pass
+# With the reloader on, the first process only watches files and the child it spawns does the serving
+USE_RELOADER = os.getenv('USE_RELOADER', 'false').lower() == 'true'
+IS_RELOADER_PARENT = USE_RELOADER and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+# Initialize database on startup (in the serving process only)
+if not IS_RELOADER_PARENT:
+    try:
+        initialize_database()
+        print("Database initialized successfully")
+    except Exception as e:
+        print(f"Failed to initialize database: {e}")
+        # Continue running but log the error
+        pass
 
 
 @app.route('/')
@@ -169,6 +242,16 @@ def google_callback():
     return redirect(url_for('login'))
 
 
+@lru_cache(maxsize=1024)
+def _username_profile(username):
+    """Build the session profile for a username-only login; repeat nicknames reuse the result"""
+    return {
+        'name': username,
+        'email': f"{username}@local",  # Fake email for consistency
+        'picture': f"https://ui-avatars.com/api/?name={quote_plus(username)}&background=4299e1&color=fff"  # Generated avatar
+    }
+
+
 @app.route('/auth/username', methods=['POST'])
 def username_auth():
     """Handle username-only authentication"""
@@ -177,12 +260,8 @@ def username_auth():
     if not username:
         return redirect(url_for('login'))
 
-    # Create a session for username-only authentication
-    session['user'] = {
-        'name': username,
-        'email': f"{username}@local",  # Fake email for consistency
-        'picture': f"https://ui-avatars.com/api/?name={username}&background=4299e1&color=fff"  # Generated avatar
-    }
+    # Create a session for username-only authentication; copied so the cached profile is never mutated
+    session['user'] = dict(_username_profile(username))
 
     return redirect(url_for('index'))
 
@@ -210,12 +289,11 @@ def health_check():
 @app.route('/util/config.json')
 def serve_config():
     """Serve the configuration JSON file"""
-    config_path = os.path.join(os.path.dirname(__file__), 'util', 'config.json')
+    # Sent as-is with ETag/Last-Modified so repeat requests get a 304 instead of a re-parsed body
     try:
-        with open(config_path, 'r') as f:
-            config_data = json.load(f)
-        return config_data
-    except Exception as e:
+        return send_from_directory(os.path.join(os.path.dirname(__file__), 'util'), 'config.json',
+                                   mimetype='application/json')
+    except NotFound as e:
         logger.error(f"Error serving config.json: {e}")
         return {'error': 'Configuration not found'}, 404
 
@@ -233,6 +311,33 @@ def leaderboard():
                            leaderboard=leaderboard_data)
 
 
+@app.route(f'{DRAWING_URL_PREFIX}/<room_id>/<drawing_id>')
+def get_drawing(room_id, drawing_id):
+    """
+    Serve a drawing from a room's current voting sets as a PNG image.
+
+    Voting emits reference drawings by URL so the base64 data is not repeated
+    in every player's payload. Only players in the room may fetch them.
+    """
+    if 'user' not in session:
+        return {'error': 'Not authenticated'}, 401
+
+    game = GAME_STATE_SH.get_game(room_id)
+    if game and not game.has_username(session['user'].get('name')):
+        return {'error': 'Not a player in this room'}, 403
+    data_url = game.drawings_by_id.get(drawing_id) if game else None
+    if not data_url or ',' not in data_url:
+        return {'error': 'Drawing not found'}, 404
+
+    try:
+        png = base64.b64decode(data_url.split(',', 1)[1])
+    except (binascii.Error, ValueError):
+        return {'error': 'Drawing not found'}, 404
+
+    # Drawing ids are reused across games in a room, so responses must not be cached
+    return Response(png, mimetype='image/png', headers={'Cache-Control': 'no-store'})
+
+
 @app.route('/api/player/balance/<username>')
 def get_player_balance(username):
     """Get current player balance from database"""
@@ -240,7 +345,6 @@ def get_player_balance(username):
         return {'error': 'Not authenticated'}, 401
     
     try:
-        from util.db import get_player_stats
         player_stats = get_player_stats(username)
         if player_stats:
             return {'balance': player_stats['balance']}
@@ -258,10 +362,9 @@ def get_player_stats_route(username):
         return {'error': 'Not authenticated'}, 401
     
     try:
-        from util.db import get_player_stats
         stats = get_player_stats(username)
         if stats:
-            return dict(stats)
+            return stats
         else:
             return {'error': 'Player not found'}, 404
     except Exception as e:
@@ -282,7 +385,6 @@ def update_player_balance_route(username):
         if new_balance is None:
             return {'error': 'Balance not provided'}, 400
         
-        from util.db import update_player_balance
         success = update_player_balance(username, new_balance)
         
         if success:
@@ -308,10 +410,11 @@ if __name__ == '__main__':
         logger.info(f"Game will be available at http://localhost:{port}")
 
     # Ensure there's always a default room available on startup
-    try:
-        GAME_STATE_SH.ensure_default_room()
-    except Exception as e:
-        logger.error(f"Failed to create default room on startup: {e}")
+    if not IS_RELOADER_PARENT:
+        try:
+            GAME_STATE_SH.ensure_default_room()
+        except Exception as e:
+            logger.error(f"Failed to create default room on startup: {e}")
 
     # Start the server
     socketio.run(
@@ -320,5 +423,5 @@ if __name__ == '__main__':
         port=port,
         debug=CONSTANTS['debug_mode'],
         allow_unsafe_werkzeug=os.getenv('WERKZEUG_ALLOW_ASYNC_UNSAFE', 'false').lower() == 'true',
-        use_reloader=os.getenv('USE_RELOADER', 'false').lower() == 'true'
+        use_reloader=USE_RELOADER
     )
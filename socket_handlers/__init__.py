@@ -10,6 +10,7 @@ from .room_handlers import RoomHandlers
 from .game_handlers import GameHandlers
 from .admin_handlers import AdminHandlers
 from .game_state import GameStateSH, get_room_info, broadcast_room_list, GAME_STATE_SH
+from game_logic.room_registry import register_default_room_callback
 
 
 # Create convenience function for backward compatibility
@@ -18,6 +19,10 @@ def check_and_create_default_room(socketio=None):
     return GAME_STATE_SH.check_and_create_default_room(socketio)
 
 
+# Let game logic create a new default room when a game starts
+register_default_room_callback(check_and_create_default_room)
+
+
 __all__ = [
     'setup_socket_handlers',
     'ConnectionHandlers',
@@ -75,7 +75,7 @@ class ConnectionHandlers:
                 else:
                     # Broadcast updated player list
                     emit('players_updated', {
-                        'players': list(game.players.values()),
+                        'players': game.players_payload(),
                         'count': len(game.players)
                     }, room=room_id)
 
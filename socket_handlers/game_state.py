@@ -104,7 +104,7 @@ def get_room_info(game_state_sh=GAME_STATE_SH):
         for player_id, player_data in game.players.items():
             player_details.append({
                 'id': player_id,
-                'username': player_data['username']
+                'username': player_data.username
             })
 
         room_info = {
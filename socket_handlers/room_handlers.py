@@ -5,7 +5,6 @@ from flask import request
 from flask_socketio import emit, join_room, leave_room
 
 from game_logic import GameStateGL
-from util.config import TIMER_CONFIG
 from util.logging_utils import debug_log
 from .game_state import GAME_STATE_SH, broadcast_room_list
 
@@ -54,7 +53,7 @@ class RoomHandlers:
 
             # Broadcast player list update
             emit('players_updated', {
-                'players': list(game.players.values()),
+                'players': game.players_payload(),
                 'count': len(game.players)
             }, room=room_id)
 
@@ -93,7 +92,7 @@ class RoomHandlers:
                     'room_id': room_id,
                     'player_id': player_id,
                     'username': username,
-                    'players': list(game.players.values()),
+                    'players': game.players_payload(),
                     'success': True,
                     'message': f'Joined room {room_id} successfully!',
                     'phase': game.phase,
@@ -112,17 +111,18 @@ class RoomHandlers:
                         game.timer.start_joining_countdown(self.socketio)
                     else:
                         # If countdown is already running, send the current countdown state to the new player
-                        if hasattr(game, 'countdown_start_time'):
-                            elapsed = time.time() - game.countdown_start_time
-                            remaining = max(0, TIMER_CONFIG['joining'] - int(elapsed))
+                        end_epoch = game.countdown_end_epoch
+                        if end_epoch:
+                            remaining = max(0, int(end_epoch - time.time()))
                             if remaining > 0:
                                 debug_log("Sending countdown state to late joiner", player_id, room_id,
                                           {'remaining_seconds': remaining})
-                                emit('joining_countdown_started', {'seconds': remaining}, to=player_id)
+                                emit('joining_countdown_started', {'seconds': remaining, 'end_epoch': end_epoch},
+                                     to=player_id)
 
                 # Broadcast player list update
                 emit('players_updated', {
-                    'players': list(game.players.values()),
+                    'players': game.players_payload(),
                     'count': len(game.players)
                 }, room=room_id)
 
@@ -176,8 +176,8 @@ class RoomHandlers:
 
         # Remove player from game and room
         if player_id in game.players:
-            username = game.players[player_id]['username']
-            del game.players[player_id]
+            username = game.players[player_id].username
+            game.remove_player(player_id)
             debug_log("Player left room", player_id, room_id, {'username': username})
 
         # Remove from players tracking
@@ -204,7 +204,7 @@ class RoomHandlers:
         else:
             # Notify remaining players
             emit('players_updated', {
-                'players': list(game.players.values()),
+                'players': game.players_payload(),
                 'count': len(game.players)
             }, room=room_id)
 
@@ -92,7 +92,12 @@ class GameManager {
         if (countdownDisplay) {
             countdownDisplay.style.display = 'block';
         }
-        uiManager.startCountdown(data.seconds);
+        // Derive remaining time from the server deadline; clamp so client clock skew can't extend it
+        let seconds = data.seconds;
+        if (data.end_epoch) {
+            seconds = Math.min(data.seconds, Math.max(0, Math.round(data.end_epoch - Date.now() / 1000)));
+        }
+        uiManager.startCountdown(seconds);
     }
 
     handleCountdownCancelled(data) {
@@ -103,17 +108,6 @@ class GameManager {
         uiManager.showError(data.message);
     }
 
-    handleGameStarted(data) {
-        gameStateManager.setPhase(GameConfig.PHASES.DRAWING);
-        gameStateManager.setGameData(data);
-        
-        // Set prompt in UI
-        const promptText = document.getElementById('promptText');
-        if (promptText) {
-            promptText.textContent = data.prompt;
-        }
-    }
-
     handlePhaseChanged(data) {
         gameStateManager.setPhase(data.phase);
         
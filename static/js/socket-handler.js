@@ -81,10 +81,6 @@ class SocketHandler {
             if (window.gameManager) window.gameManager.handleCountdownCancelled(data);
         }));
 
-        this.socket.on('game_started', this.registerHandler('game_started', (data) => {
-            if (window.gameManager) window.gameManager.handleGameStarted(data);
-        }));
-
         this.socket.on('phase_changed', this.registerHandler('phase_changed', (data) => {
             if (window.gameManager) window.gameManager.handlePhaseChanged(data);
         }));
@@ -121,9 +117,11 @@ class SocketHandler {
             if (window.gameManager) window.gameManager.handleVotingRoundExcluded(data);
         }));
 
-        this.socket.on('vote_cast', this.registerHandler('vote_cast', (data) => {
-            // Handle vote cast confirmation - this helps track voting progress
-            console.log(`🗳️ Game Progress: Vote cast by player for set ${data.set_index + 1}`);
+        this.socket.on('votes_cast', this.registerHandler('votes_cast', (data) => {
+            // Votes are announced in batches - this helps track voting progress
+            data.votes.forEach((vote) => {
+                console.log(`🗳️ Game Progress: Vote cast by player for set ${vote.set_index + 1}`);
+            });
         }));
 
         // Game results - delegate to GameManager
@@ -116,10 +116,9 @@ class TimerTestHelper:
         
     @contextmanager
     def mock_all_timers(self):
-        """Context manager to mock all threading.Timer instances"""
-        original_timer = threading.Timer
+        """Context manager to mock all timers scheduled on the shared timer service"""
         mock_timers = []
-        
+
         def mock_timer_constructor(interval, function, args=None, kwargs=None):
             mock_timer = MagicMock()
             mock_timer.interval = interval
@@ -128,12 +127,12 @@ class TimerTestHelper:
             mock_timer.kwargs = kwargs or {}
             mock_timer.finished = threading.Event()
             mock_timer.is_alive = MagicMock(return_value=False)
-            
+
             # Store for later access
             mock_timers.append(mock_timer)
             return mock_timer
-            
-        with patch('threading.Timer', side_effect=mock_timer_constructor):
+
+        with patch('game_logic.timer.TIMER_SERVICE.schedule', side_effect=mock_timer_constructor):
             yield mock_timers
     
     def trigger_timer_callback(self, mock_timer):
@@ -389,10 +388,9 @@ def assert_player_in_game(game, player_id):
     """Assert that a player is properly registered in a game"""
     assert player_id in game.players
     player_data = game.players[player_id]
-    assert 'username' in player_data
-    assert 'balance' in player_data
-    assert 'id' in player_data
-    assert player_data['id'] == player_id
+    assert player_data.username
+    assert player_data.balance is not None
+    assert player_data.id == player_id
 
 
 def assert_database_consistency(username, expected_balance=None):
@@ -20,7 +20,8 @@ from server import app, socketio as app_socketio
 from socket_handlers.game_state import GAME_STATE_SH
 from game_logic.game_state import GameStateGL
 from util.config import CONSTANTS
-from util.db import get_player_stats, record_game_completion, update_player_balance
+from util.db import (get_player_stats, record_game_completion, update_player_balance, update_player_balances,
+                     record_player_game_completions, get_leaderboard)
 
 
 class TestTimerExpiryEdgeCases:
@@ -186,7 +187,7 @@ class TestPlayerReconnectionAndStateRecovery:
         # Verify state recovery
         assert len(game.players) == initial_player_count
         assert new_bob.player_id in game.players
-        assert game.players[new_bob.player_id]['username'] == "Bob"
+        assert game.players[new_bob.player_id].username == "Bob"
 
     def test_player_disconnect_during_drawing_phase(self, direct_clients, clean_game_state):
         """Test player disconnection during drawing phase"""
@@ -292,7 +293,7 @@ class TestPlayerReconnectionAndStateRecovery:
         # Verify player data loaded from database
         assert alice_test.player_id in game.players
         player_data = game.players[alice_test.player_id]
-        assert player_data['balance'] == initial_balance
+        assert player_data.balance == initial_balance
         
         # Simulate disconnect and cleanup
         alice_test.leave_room()
@@ -306,7 +307,7 @@ class TestPlayerReconnectionAndStateRecovery:
         reconnect_player_data = new_game.players[alice_reconnect.player_id]
         
         # Should load the same balance from database
-        assert reconnect_player_data['balance'] == initial_balance
+        assert reconnect_player_data.balance == initial_balance
 
 
 class TestConcurrentRoomAndGameManagement:
@@ -380,7 +381,7 @@ class TestConcurrentRoomAndGameManagement:
         assert len(game.players) <= game.max_players  # Shouldn't exceed max
         
         # Verify no duplicate players
-        usernames = [player_data['username'] for player_data in game.players.values()]
+        usernames = [player_data.username for player_data in game.players.values()]
         assert len(usernames) == len(set(usernames)), "No duplicate usernames should exist"
 
     def test_game_state_isolation_between_rooms(self, direct_clients, clean_game_state):
@@ -543,7 +544,7 @@ class TestDatabaseConsistency:
                 player_id = test_players[username].player_id
                 if player_id in game.players:
                     # Game balance should match database
-                    game_balance = game.players[player_id]['balance']
+                    game_balance = game.players[player_id].balance
                     db_balance = db_helper.get_player_balance(username)
                     
                     assert db_balance is not None, f"Player {username} not found in database"
@@ -671,6 +672,86 @@ class TestDatabaseConsistency:
         assert final_balance is not None
         assert final_balance in [900, 950, 1100]  # Should be one of the attempted values
 
+    def test_bulk_balance_and_completion_writes(self, clean_game_state, clean_database, db_helper):
+        """Test that bulk DB helpers write every player's row in one call"""
+        for username in ('TestAlice', 'TestBob', 'TestCarol'):
+            db_helper.create_test_player(username, 1000)
+        initial_games = {u: get_player_stats(u)['games_played'] for u in ('TestAlice', 'TestBob', 'TestCarol')}
+
+        assert update_player_balances([('TestAlice', 900), ('TestBob', 950)])
+        assert db_helper.get_player_balance('TestAlice') == 900
+        assert db_helper.get_player_balance('TestBob') == 950
+        assert db_helper.get_player_balance('TestCarol') == 1000
+
+        record_player_game_completions('BULKTEST', [
+            {'username': 'TestAlice', 'player_id': 'a', 'balance_before': 900, 'balance_after': 995, 'stake': 100},
+            {'username': 'TestCarol', 'player_id': 'c', 'balance_before': 1000, 'balance_after': 995, 'stake': 0},
+        ])
+        assert db_helper.get_player_balance('TestAlice') == 995
+        assert db_helper.get_player_balance('TestCarol') == 995
+        assert get_player_stats('TestAlice')['games_played'] == initial_games['TestAlice'] + 1
+        assert get_player_stats('TestBob')['games_played'] == initial_games['TestBob']
+
+    def test_disconnect_balance_writes_are_coalesced(self, clean_game_state, clean_database, db_helper):
+        """Test that queued disconnect balances keep only the latest value per username"""
+        from game_logic.game_state import queue_balance_write, flush_pending_balance_writes
+
+        db_helper.create_test_player('TestAlice', 1000)
+        with patch('game_logic.game_state.update_player_balances', wraps=update_player_balances) as mock_update:
+            queue_balance_write('TestAlice', 900)
+            queue_balance_write('TestAlice', 850)
+            flush_pending_balance_writes()
+            flush_pending_balance_writes()
+
+        mock_update.assert_called_once_with([('TestAlice', 850)])
+        assert db_helper.get_player_balance('TestAlice') == 850
+
+    def test_failed_balance_flush_is_requeued(self, clean_game_state, clean_database, db_helper):
+        """Test that balances from a failed flush are written by the next one"""
+        from game_logic.game_state import queue_balance_write, flush_pending_balance_writes
+
+        db_helper.create_test_player('TestAlice', 1000)
+        with patch('game_logic.game_state.update_player_balances', return_value=False), \
+                patch('game_logic.game_state.TIMER_SERVICE.schedule') as mock_schedule:
+            queue_balance_write('TestAlice', 900)
+            flush_pending_balance_writes()
+        assert mock_schedule.call_count == 2  # initial debounce plus the retry
+        assert db_helper.get_player_balance('TestAlice') == 1000
+
+        flush_pending_balance_writes()
+        assert db_helper.get_player_balance('TestAlice') == 900
+
+    def test_player_stats_read_write_read(self, clean_game_state, clean_database, db_helper):
+        """Test that a cached stats read is replaced by the committed value after a write"""
+        db_helper.create_test_player('TestAlice', 1000)
+        first = get_player_stats('TestAlice')
+        assert first['balance'] == 1000
+        with patch('util.db.get_db_connection') as mock_conn:
+            assert get_player_stats('TestAlice') is first
+        mock_conn.assert_not_called()
+
+        assert update_player_balance('TestAlice', 750)
+        assert get_player_stats('TestAlice')['balance'] == 750
+
+    def test_leaderboard_cache_hit_and_invalidation(self, clean_game_state, clean_database, db_helper):
+        """Test that the leaderboard is served from cache until a player write commits"""
+        db_helper.create_test_player('TestAlice', 1000)
+        record_player_game_completions('CACHETEST', [
+            {'username': 'TestAlice', 'player_id': 'a', 'balance_before': 1000, 'balance_after': 1000, 'stake': 0},
+        ])
+
+        def alice_balance(rows):
+            return next(row['balance'] for row in rows if row['username'] == 'TestAlice')
+
+        first = get_leaderboard(limit=10000)
+        assert alice_balance(first) == 1000
+        with patch('util.db.get_db_connection') as mock_conn:
+            assert get_leaderboard(limit=10000) is first
+        mock_conn.assert_not_called()
+
+        assert update_player_balance('TestAlice', 1234)
+        assert alice_balance(get_leaderboard(limit=10000)) == 1234
+
 
 class TestErrorHandlingAndRecovery:
     """Test error handling and graceful recovery scenarios"""
@@ -845,7 +926,7 @@ class TestSocketEventBroadcasting:
         # Manually trigger player update broadcast (simulating what happens in real handlers)
         from socket_handlers.game_state import GAME_STATE_SH
         mock_socketio.emit('players_updated', {
-            'players': list(game.players.values()),
+            'players': game.players_payload(),
             'count': len(game.players)
         }, room=room_id)
         
@@ -183,6 +183,63 @@ class TestGameFlow:
         # Should not overwrite - still only one drawing
         assert len(game.original_drawings) == 1
 
+    def test_voting_drawings_served_by_url(self, direct_clients, clean_game_state):
+        """Test that voting emits reference drawings by URL and the route serves the PNG"""
+        alice = direct_clients[0]
+        room_id = alice.create_room()
+        alice.join_room(room_id)
+        game = GAME_STATE_SH.get_game(room_id)
+
+        drawing_data = create_sample_drawing()
+        game.original_drawings[alice.player_id] = drawing_data
+        game.voting_phase._create_drawing_sets()
+        game.phase = "voting"
+
+        with patch.object(app_socketio, 'emit') as mock_emit, \
+                patch('game_logic.timer.Timer.start_phase_timer'):
+            game.voting_phase.start_voting_on_set(app_socketio)
+        payload = next(c.args[1] for c in mock_emit.call_args_list if c.args[0].startswith('voting_round'))
+        url = payload['drawings'][0]['drawing']
+        assert url == f"/drawings/{room_id}/original_{alice.player_id}"
+        # The stored set keeps the full image for scoring and history
+        assert game.drawing_sets[0]['drawings'][0]['drawing'] == drawing_data
+
+        client = app.test_client()
+        assert client.get(url).status_code == 401
+        with client.session_transaction() as sess:
+            sess['user'] = {'name': 'NotInRoom'}
+        assert client.get(url).status_code == 403
+        with client.session_transaction() as sess:
+            sess['user'] = {'name': alice.username}
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        assert response.data == base64.b64decode(drawing_data.split(',', 1)[1])
+        assert client.get(f"/drawings/{room_id}/missing").status_code == 404
+
+        alice.delete_player()
+
+    def test_drawing_route_accepts_sanitized_display_names(self, direct_clients, clean_game_state):
+        """Test that a player whose display name was sanitized on join can still fetch voting drawings"""
+        from game_logic.game_state import sanitize_username
+        from util.db import delete_player
+
+        display_name = "Anne-Marie O'Neil-Fitzgerald, Duchess of Somewhere!"
+        room_id = direct_clients[0].create_room()
+        game = GAME_STATE_SH.get_game(room_id)
+        assert game.add_player('sanitized_sid', display_name)
+        stored_name = game.players['sanitized_sid'].username
+        assert stored_name == sanitize_username(display_name)
+        assert len(stored_name) == 32 and "'" not in stored_name
+        game.drawings_by_id['original_sanitized_sid'] = create_sample_drawing()
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user'] = {'name': display_name}
+        assert client.get(f"/drawings/{room_id}/original_sanitized_sid").status_code == 200
+
+        delete_player(stored_name)
+
 
 class TestErrorHandling:
     """Test error conditions and edge cases"""
@@ -227,6 +284,29 @@ class TestErrorHandling:
         # depending on implementation
         assert game.phase in ["ended_early", "results"]  # Allow various states
 
+    @patch('game_logic.timer.Timer.start_phase_timer')
+    def test_concurrent_start_game_only_starts_once(self, mock_timer, direct_clients, clean_game_state):
+        """Test racing start triggers deduct the entry fee and stake only once"""
+        alice, bob, carol = direct_clients[:3]
+
+        room_id = alice.create_room()
+        alice.join_room(room_id)
+        bob.join_room(room_id)
+        carol.join_room(room_id)
+
+        game = GAME_STATE_SH.get_game(room_id)
+        initial_balances = {pid: p.balance for pid, p in game.players.items()}
+
+        threads = [threading.Thread(target=game.start_game, args=(app_socketio,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5.0)
+
+        assert game.phase == "drawing"
+        for pid, player in game.players.items():
+            assert player.balance == initial_balances[pid] - game.entry_fee - game.prize_per_player
+
 
 class TestScoringAndTokens:
     """Test scoring system and token distribution"""
@@ -248,7 +328,7 @@ class TestScoringAndTokens:
         game = GAME_STATE_SH.get_game(room_id)
 
         # Set up staking scenario
-        initial_balances = {player_id: player_data['balance'] for player_id, player_data in game.players.items()}
+        initial_balances = {player_id: player_data.balance for player_id, player_data in game.players.items()}
 
         # Set up drawing phase
         game.start_game(app_socketio)
@@ -297,7 +377,7 @@ class TestScoringAndTokens:
         assert game.phase == "results"
         
         # Verify scoring rules: there should be no difference in token balances
-        final_balances = {player_id: player_data['balance'] for player_id, player_data in game.players.items()}
+        final_balances = {player_id: player_data.balance for player_id, player_data in game.players.items()}
         
         # Verify token conservation (total should be preserved)
         total_initial = sum(initial_balances.values())
@@ -315,6 +395,30 @@ class TestScoringAndTokens:
         bob.delete_player()
         carol.delete_player()
 
+    def test_blank_image_detection(self):
+        """Test that only all-white or fully transparent drawings count as blank"""
+        from PIL import Image
+        from game_logic.scoring_engine import is_blank_image, BLANK_CANVAS_PNG
+
+        def encode(img):
+            buffer = io.BytesIO()
+            img.save(buffer, format='PNG')
+            return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+        assert is_blank_image(encode(Image.new('RGB', (50, 50), color=(255, 255, 255))))
+        assert is_blank_image(encode(Image.new('RGBA', (50, 50), color=(0, 0, 0, 0))))
+        marked = Image.new('RGBA', (50, 50), color=(255, 255, 255, 255))
+        marked.putpixel((25, 25), (0, 0, 0, 255))
+        assert not is_blank_image(encode(marked))
+        assert not is_blank_image(create_sample_drawing())
+        assert is_blank_image("not an image")
+
+        # Oversized payloads are treated as drawn, and the missing-copy placeholder as blank, without decoding
+        with patch('game_logic.scoring_engine.Image.open') as mock_open:
+            assert not is_blank_image("data:image/png;base64," + "A" * 20000)
+            assert is_blank_image(f"data:image/png;base64,{BLANK_CANVAS_PNG}")
+            mock_open.assert_not_called()
+
 
 class TestConcurrentGames:
     """Test multiple games running simultaneously"""
@@ -443,7 +547,7 @@ class TestTimerAndPhaseTransitions:
                 game.drawing_phase.submit_drawing(carol.player_id, carol_drawing, app_socketio, check_early_advance=False)
 
                 # Check if all players have drawn
-                all_drawn = all(player.get('has_drawn_original', False) for player in game.players.values())
+                all_drawn = all(player.has_drawn_original for player in game.players.values())
                 assert all_drawn is True
 
                 # Should trigger early advancement to drawing phase if implemented
@@ -473,6 +577,38 @@ class TestTimerAndPhaseTransitions:
             if CONSTANTS.get('testing_mode'):
                 assert drawing_timer == 5
 
+    def test_timer_service_fires_in_deadline_order_and_skips_cancelled(self):
+        """Test the shared timer service runs callbacks by deadline and honours cancel"""
+        from game_logic.timer import TIMER_SERVICE
+
+        fired = []
+        done = threading.Event()
+        TIMER_SERVICE.schedule(0.15, lambda: (fired.append('late'), done.set()))
+        cancelled = TIMER_SERVICE.schedule(0.05, lambda: fired.append('cancelled'))
+        TIMER_SERVICE.schedule(0.02, lambda: fired.append('early'))
+        cancelled.cancel()
+
+        assert done.wait(timeout=2.0)
+        assert fired == ['early', 'late']
+
+    def test_timer_service_logs_callback_errors(self):
+        """Test that a failing timer callback is logged with its traceback outside debug mode"""
+        from game_logic.timer import TIMER_SERVICE
+
+        done = threading.Event()
+
+        def failing_callback():
+            done.set()
+            raise RuntimeError("phase transition failed")
+
+        with patch('game_logic.timer.logging.getLogger') as mock_get_logger:
+            TIMER_SERVICE.schedule(0, failing_callback)
+            assert done.wait(timeout=2.0)
+            deadline = time.time() + 2.0
+            while not mock_get_logger.return_value.exception.called and time.time() < deadline:
+                time.sleep(0.01)
+        mock_get_logger.return_value.exception.assert_called_once_with("Timer callback failed")
+
 
 class TestDataValidation:
     """Test input validation and sanitization"""
@@ -526,6 +662,17 @@ class TestDataValidation:
                     game.timer.countdown_timer.cancel()
                     game.timer.countdown_timer = None
 
+    def test_json_provider_honours_flask_options(self):
+        """Test that API JSON keeps Flask's sorted keys and HTTP-date datetimes"""
+        import json
+        from datetime import datetime
+
+        with app.app_context():
+            encoded = app.json.dumps({'b': 1, 'a': datetime(2024, 1, 2, 3, 4, 5)})
+        decoded = json.loads(encoded)
+        assert list(decoded) == ['a', 'b']
+        assert decoded['a'] == 'Tue, 02 Jan 2024 03:04:05 GMT'
+
     def test_username_sanitization(self, clean_game_state):
         """Test username input sanitization"""
 
@@ -560,7 +707,7 @@ class TestDataValidation:
                     test_helper.join_room(room_id)
 
                     if game and test_helper.player_id in game.players:
-                        stored_username = game.players[test_helper.player_id]['username']
+                        stored_username = game.players[test_helper.player_id].username
                         # Username should be sanitized but not empty
                         assert len(stored_username.strip()) > 0
                         # Should not contain dangerous characters
@@ -108,4 +108,4 @@ def load_prompts():
 
 # Load configurations at module import
 TIMER_CONFIG = get_timer_config()
-PROMPTS = load_prompts()
+PROMPTS = tuple(load_prompts())  # Immutable so callers can sample without copying
@@ -2,6 +2,8 @@
 import sqlite3
 import os
 import threading
+import time
+from collections import Counter
 from contextlib import contextmanager
 from util.logging_utils import debug_log
 from util.config import CONSTANTS
@@ -12,6 +14,18 @@ DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'pixel_plagia
 # Thread-local storage for database connections
 _local = threading.local()
 
+# Leaderboard rows and player stats are reused for this long unless a player write invalidates them first
+LEADERBOARD_CACHE_SECONDS = 30
+PLAYER_STATS_CACHE_SECONDS = 5
+_leaderboard_cache = {}  # limit -> (expires_at, rows)
+_player_stats_cache = {}  # username -> (expires_at, stats)
+
+
+def _invalidate_player_caches():
+    """Drop cached reads of the players table; call after a write has committed"""
+    _leaderboard_cache.clear()
+    _player_stats_cache.clear()
+
 
 def get_db_connection():
     """
@@ -25,6 +39,8 @@ def get_db_connection():
     if not hasattr(_local, 'connection'):
         _local.connection = sqlite3.connect(DB_PATH)
         _local.connection.row_factory = sqlite3.Row  # Enable column access by name
+        # WAL (set in initialize_database) stays durable at this level and skips an fsync per commit
+        _local.connection.execute('PRAGMA synchronous=NORMAL')
     return _local.connection
 
 
@@ -59,6 +75,9 @@ def initialize_database():
     try:
         with get_db() as conn:
             cursor = conn.cursor()
+
+            # Write-ahead logging lets the per-thread connections read while another thread writes
+            cursor.execute('PRAGMA journal_mode=WAL')
             
             # Create players table with username as primary key
             cursor.execute('''
@@ -131,6 +150,10 @@ def initialize_database():
                 'game_history_drawings (room_id, set_index)')
             cursor.execute(
                 'CREATE INDEX IF NOT EXISTS idx_game_history_drawings_room ON game_history_drawings (room_id)')
+            # Matches get_leaderboard's filter and ordering so the top rows are read straight off the index
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_players_leaderboard ON '
+                'players (balance DESC, total_winnings DESC, games_played DESC) WHERE games_played > 0')
             
             debug_log("Database initialized successfully", None, None, {'db_path': DB_PATH})
             
@@ -155,6 +178,7 @@ def get_or_create_player(username, email=None):
     dict
         Player data including balance and statistics
     """
+    created = False
     try:
         with get_db() as conn:
             cursor = conn.cursor()
@@ -176,14 +200,13 @@ def get_or_create_player(username, email=None):
                     'balance': player['balance'],
                     'games_played': player['games_played']
                 })
-                
-                return dict(player)
             else:
                 # Create new player
                 cursor.execute('''
                     INSERT INTO players (username, email, balance)
                     VALUES (?, ?, ?)
                 ''', (username, email, CONSTANTS['INITIAL_BALANCE']))
+                created = True
                 
                 # Get the newly created player
                 cursor.execute('SELECT * FROM players WHERE username = ?', (username,))
@@ -193,8 +216,11 @@ def get_or_create_player(username, email=None):
                     'username': username,
                     'initial_balance': CONSTANTS['INITIAL_BALANCE']
                 })
-                
-                return dict(player)
+
+        # Invalidate only once the insert is committed, so no reader can re-cache the old rows
+        if created:
+            _invalidate_player_caches()
+        return dict(player)
                 
     except Exception as e:
         debug_log("DB operation: Failed to get or create player", None, None, {
@@ -222,13 +248,15 @@ def delete_player(username):
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM players WHERE username = ?', (username,))
+            deleted = cursor.rowcount > 0
+        _invalidate_player_caches()
 
-            if cursor.rowcount > 0:
-                debug_log("DB operation: Deleted player", None, None, {'username': username})
-                return True
-            else:
-                debug_log("DB operation: Player not found for deletion", None, None, {'username': username})
-                return False
+        if deleted:
+            debug_log("DB operation: Deleted player", None, None, {'username': username})
+            return True
+        else:
+            debug_log("DB operation: Player not found for deletion", None, None, {'username': username})
+            return False
 
     except Exception as e:
         debug_log("DB operation: Failed to delete player", None, None, {
@@ -262,19 +290,21 @@ def update_player_balance(username, new_balance):
                 SET balance = ?, last_played = CURRENT_TIMESTAMP 
                 WHERE username = ?
             ''', (new_balance, username))
+            updated = cursor.rowcount > 0
+        _invalidate_player_caches()
             
-            if cursor.rowcount > 0:
-                debug_log("DB operation: Updated player balance", None, None, {
-                    'username': username,
-                    'new_balance': new_balance
-                })
-                return True
-            else:
-                debug_log("DB operation: Player not found for balance update", None, None, {
-                    'username': username,
-                    'new_balance': new_balance
-                })
-                return False
+        if updated:
+            debug_log("DB operation: Updated player balance", None, None, {
+                'username': username,
+                'new_balance': new_balance
+            })
+            return True
+        else:
+            debug_log("DB operation: Player not found for balance update", None, None, {
+                'username': username,
+                'new_balance': new_balance
+            })
+            return False
                 
     except Exception as e:
         debug_log("DB operation: Failed to update player balance", None, None, {
@@ -285,6 +315,124 @@ def update_player_balance(username, new_balance):
         return False
 
 
+def update_player_balances(balances):
+    """
+    Update several players' balances in a single transaction.
+
+    Parameters
+    ----------
+    balances : list of tuple
+        (username, new_balance) pairs
+
+    Returns
+    -------
+    bool
+        True if the update was successful
+    """
+    if not balances:
+        return True
+
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE players
+                SET balance = ?, last_played = CURRENT_TIMESTAMP
+                WHERE username = ?
+            ''', [(new_balance, username) for username, new_balance in balances])
+            players_updated = cursor.rowcount
+        _invalidate_player_caches()
+
+        debug_log("DB operation: Updated player balances", None, None, {
+            'players_updated': players_updated,
+            'players_requested': len(balances)
+        })
+        return True
+
+    except Exception as e:
+        debug_log("DB operation: Failed to update player balances", None, None, {
+            'error': str(e),
+            'usernames': [username for username, _ in balances]
+        })
+        return False
+
+
+def record_player_game_completions(room_id, completions):
+    """
+    Record a completed game for several players in a single transaction.
+
+    Parameters
+    ----------
+    room_id : str
+        Game room identifier
+    completions : list of dict
+        One dict per player with the keys accepted by record_player_game_completion:
+        username, player_id, balance_before, balance_after, stake and optionally
+        points_earned, originals_drawn, copies_made, votes_cast, correct_votes
+    """
+    if not completions:
+        return
+
+    history_rows = []
+    stats_rows = []
+    for c in completions:
+        points_earned = c.get('points_earned', 0)
+        originals_drawn = c.get('originals_drawn', 0)
+        copies_made = c.get('copies_made', 0)
+        votes_cast = c.get('votes_cast', 0)
+        correct_votes = c.get('correct_votes', 0)
+        balance_before = c['balance_before']
+        balance_after = c['balance_after']
+
+        history_rows.append((room_id, c['username'], c['player_id'], balance_before, balance_after, c['stake'],
+                             points_earned, originals_drawn, copies_made, votes_cast, correct_votes))
+        stats_rows.append((max(0, balance_after - balance_before),
+                           max(0, balance_before - balance_after),
+                           1 if originals_drawn > 0 and points_earned > 0 else 0,
+                           1 if copies_made > 0 and points_earned > 0 else 0,
+                           originals_drawn, copies_made, votes_cast, correct_votes,
+                           balance_after, c['username']))
+
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+
+            cursor.executemany('''
+                INSERT INTO game_history_players
+                (room_id, username, player_id, balance_before, balance_after, stake,
+                 points_earned, originals_drawn, copies_made, votes_cast, correct_votes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', history_rows)
+
+            cursor.executemany('''
+                UPDATE players SET
+                    games_played = games_played + 1,
+                    total_winnings = total_winnings + ?,
+                    total_losses = total_losses + ?,
+                    successful_originals = successful_originals + ?,
+                    successful_copies = successful_copies + ?,
+                    total_originals = total_originals + ?,
+                    total_copies = total_copies + ?,
+                    total_votes_cast = total_votes_cast + ?,
+                    correct_votes = correct_votes + ?,
+                    balance = ?,
+                    last_played = CURRENT_TIMESTAMP
+                WHERE username = ?
+            ''', stats_rows)
+
+            debug_log("DB operation: Recorded game completions", None, room_id, {
+                'players_recorded': len(completions)
+            })
+        _invalidate_player_caches()
+
+    except Exception as e:
+        debug_log("DB operation: Failed to record game completions", None, room_id, {
+            'error': str(e),
+            'usernames': [c['username'] for c in completions]
+        })
+        raise
+
+
 def record_player_game_completion(username, player_id, room_id, balance_before, balance_after, stake, 
                                  points_earned=0, originals_drawn=0, copies_made=0, votes_cast=0, correct_votes=0):
     """
@@ -368,6 +516,7 @@ def record_player_game_completion(username, player_id, room_id, balance_before,
                 'points_earned': points_earned,
                 'stake': stake
             })
+        _invalidate_player_caches()
             
     except Exception as e:
         debug_log("DB operation: Failed to record player game completion", None, room_id, {
@@ -391,7 +540,7 @@ def record_drawing_sets_data(room_id, drawing_sets, votes, players, player_promp
     votes : dict
         Vote data indexed by set
     players : dict
-        Player information
+        Player session records keyed by player ID, each with a ``username`` attribute
     player_prompts : dict
         Prompts assigned to each player
     """
@@ -402,7 +551,7 @@ def record_drawing_sets_data(room_id, drawing_sets, votes, players, player_promp
             # Record drawing set data
             for set_index, drawing_set in enumerate(drawing_sets):
                 original_id = drawing_set['original_id']
-                original_username = players.get(original_id, {}).get('username', 'Unknown')
+                original_username = getattr(players.get(original_id), 'username', 'Unknown')
                 original_prompt = player_prompts.get(original_id, 'Unknown')
 
                 # Find copiers
@@ -410,7 +559,7 @@ def record_drawing_sets_data(room_id, drawing_sets, votes, players, player_promp
                 copier_ids = []
                 for drawing in drawing_set['drawings']:
                     if drawing['type'] == 'copy':
-                        copier_username = players.get(drawing['player_id'], {}).get('username', 'Unknown')
+                        copier_username = getattr(players.get(drawing['player_id']), 'username', 'Unknown')
                         copiers.append(copier_username)
                         copier_ids.append(drawing['player_id'])
 
@@ -419,13 +568,8 @@ def record_drawing_sets_data(room_id, drawing_sets, votes, players, player_promp
                     copiers.append(None)
                     copier_ids.append(None)
 
-                # Count votes for each drawing
-                set_votes = votes.get(set_index, {})
-                vote_counts = {}
-
-                for drawing in drawing_set['drawings']:
-                    drawing_id = drawing['id']
-                    vote_counts[drawing_id] = sum(1 for vote in set_votes.values() if vote == drawing_id)
+                # Count votes for each drawing in a single pass over the set's votes
+                vote_counts = Counter(votes.get(set_index, {}).values())
 
                 # Get vote counts (original first, then copies in order)
                 original_drawing_id = f"original_{original_id}"
@@ -499,7 +643,7 @@ def record_game_completion(username, room_id, balance_before, balance_after, sta
     votes : dict, optional
         Vote data indexed by set (only pass for one player to avoid duplicates)
     players : dict, optional
-        Player information (only pass for one player to avoid duplicates)
+        Player session records keyed by player ID (only pass for one player to avoid duplicates)
     player_prompts : dict, optional
         Prompts assigned to each player (only pass for one player to avoid duplicates)
     """
@@ -542,8 +686,13 @@ def get_player_stats(username):
     Returns
     -------
     dict or None
-        Player statistics or None if player not found
+        Player statistics or None if player not found. Found players are cached
+        for PLAYER_STATS_CACHE_SECONDS, so treat the dict as read-only.
     """
+    cached = _player_stats_cache.get(username)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     try:
         with get_db() as conn:
             cursor = conn.cursor()
@@ -551,8 +700,10 @@ def get_player_stats(username):
             player = cursor.fetchone()
 
             if player:
-                debug_log("DB operation: Retrieved player stats", None, None, dict(player))
-                return dict(player)
+                stats = dict(player)
+                debug_log("DB operation: Retrieved player stats", None, None, stats)
+                _player_stats_cache[username] = (time.monotonic() + PLAYER_STATS_CACHE_SECONDS, stats)
+                return stats
             return None
 
     except Exception as e:
@@ -575,8 +726,13 @@ def get_leaderboard(limit=50):
     Returns
     -------
     list
-        List of player dictionaries sorted by performance metrics
+        List of player dictionaries sorted by performance metrics. The list is
+        shared with later callers until the cache expires, so treat it as read-only.
     """
+    cached = _leaderboard_cache.get(limit)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     try:
         with get_db() as conn:
             cursor = conn.cursor()
@@ -616,7 +772,9 @@ def get_leaderboard(limit=50):
                            ''', (limit,))
 
             players = cursor.fetchall()
-            return [dict(player) for player in players]
+            rows = [dict(player) for player in players]
+            _leaderboard_cache[limit] = (time.monotonic() + LEADERBOARD_CACHE_SECONDS, rows)
+            return rows
 
     except Exception as e:
         debug_log("DB operation: Failed to get leaderboard", None, None, {'error': str(e)})
@@ -0,0 +1,51 @@
+# JSON codec for Socket.IO packets, backed by orjson when it is installed
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is used without it
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
+
+def dumps(obj, **kwargs):
+    """
+    Serialize an object to a JSON string.
+
+    Parameters
+    ----------
+    obj : object
+        Packet payload to encode
+    **kwargs
+        Options for the stdlib encoder. Under orjson, sort_keys and default are
+        honoured (default also encodes datetimes, as it would with the stdlib),
+        any indent is rendered as two spaces, and the output is always UTF-8 as
+        if ensure_ascii were False; separators are ignored.
+
+    Returns
+    -------
+    str
+        Encoded JSON text
+    """
+    if orjson is not None:
+        option = _ORJSON_OPTIONS
+        if kwargs.get('sort_keys'):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        default = kwargs.get('default')
+        if default is not None:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except TypeError:
+            pass  # Types orjson cannot encode go through the stdlib encoder
+    return json.dumps(obj, **kwargs)
+
+
+def loads(s, **kwargs):
+    """Deserialize a JSON string or bytes into Python objects."""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s, **kwargs)
@@ -1,10 +1,29 @@
 # Logging utilities for Pixel Plagiarist server
+import atexit
 import logging
+import logging.handlers
 import os
 import base64
+import queue
 from datetime import datetime
 from util.config import CONSTANTS
 
+# Debug mode is fixed for the life of the process, so resolve it once for cheap checks at call sites
+DEBUG = CONSTANTS['debug_mode']
+
+# Records waiting for the background writer; beyond this, new records are dropped rather than blocking
+LOG_QUEUE_SIZE = 10000
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that silently drops records when the bounded queue is full."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
 
 def setup_logging(file_root='pixel_plagiarist'):
     """
@@ -20,15 +39,21 @@ def setup_logging(file_root='pixel_plagiarist'):
     os.makedirs(log_folder, exist_ok=True)
     log_file_path = os.path.join(log_folder, f'{file_root}_{datetime.now():%Y-%m-%d_%H%M%S}.log')
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.FileHandler(log_file_path, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    handlers = [logging.FileHandler(log_file_path, encoding='utf-8'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Callers only enqueue records; a single listener thread does the file and console I/O
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The listener's handlers apply the full format, so the queued record keeps just the message
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
     
     logger = logging.getLogger(__name__)
     
@@ -112,19 +137,21 @@ def debug_log(message, player_id=None, room_id=None, extra_data=None):
     extra_data : dict, optional
         Additional data to include in the log
     """
-    if CONSTANTS['debug_mode']:
-        log_parts = []
-
-        if room_id:
-            log_parts.append(f"Room: {room_id}")
-        if player_id:
-            log_parts.append(f"Player: {player_id}")
-        log_parts.append(message)
-        if extra_data:
-            log_parts.append(f"Data: {extra_data}")
-
-        logger = logging.getLogger(__name__)
-        logger.info(" | ".join(log_parts))
+    if not DEBUG:
+        return
+
+    log_parts = []
+
+    if room_id:
+        log_parts.append(f"Room: {room_id}")
+    if player_id:
+        log_parts.append(f"Player: {player_id}")
+    log_parts.append(message)
+    if extra_data:
+        log_parts.append(f"Data: {extra_data}")
+
+    logger = logging.getLogger(__name__)
+    logger.info(" | ".join(log_parts))
 
 
 def info_log(message):